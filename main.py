@@ -4,9 +4,7 @@ from datetime import datetime
 import threading
 from tkinter import filedialog, messagebox
 import customtkinter as ctk
-import queue
 import time
-import torch
 import sys
 import subprocess
 import os
@@ -16,11 +14,14 @@ import tkinter as tk  # 添加这一行
 
 import src.AudioRecorder as AudioRecorder
 from src.AudioTranscriber import AudioTranscriber
+from src.AudioQueue import CoalescingAudioQueue
 from src.GPTResponder import GPTResponder
 from src.ResponseManager import ResponseManager
+from src.StatsReporter import StatsReporter
 from src.SettingsManager import SettingsManager
 from src.TemplateManager import TemplateManager
 import src.TranscriberModels as TranscriberModels
+from src.asr.asr_factory import ASRFactory
 from src.config import EnvConfig, SystemConfig, AudioConfig
 from src.TranscriptUI import TranscriptUI
 
@@ -203,26 +204,28 @@ def update_response_UI(responder, textbox, update_interval_slider_label, update_
                  update_interval_slider, freeze_state, transcript_ui)
 
     
-def clear_context_(transcriber, audio_queue):
+def clear_context_(transcriber, audio_queues):
     transcriber.clear_transcript_data()
-    with audio_queue.mutex:
-        audio_queue.queue.clear()
+    for audio_queue in audio_queues.values():
+        with audio_queue.mutex:
+            audio_queue.queue.clear()
 
-def clear_context(transcriber, audio_queue, transcript_ui):
+def clear_context(transcriber, audio_queues, transcript_ui):
     """
     清除所有上下文
     """
     print("Clearing context...")
     # 清除transcriber数据
     transcriber.clear_transcript_data()
-    # 清除音频队列
-    with audio_queue.mutex:
-        audio_queue.queue.clear()
+    # 清除各音频源的队列
+    for audio_queue in audio_queues.values():
+        with audio_queue.mutex:
+            audio_queue.queue.clear()
     # 清除UI显示
     transcript_ui.clear()
     print("Context cleared")
 
-def create_ui_components(root, response_manager, transcriber, audio_queue):
+def create_ui_components(root, response_manager, transcriber, audio_queues):
     """创建并配置所有UI组件"""
     # 基础设置
     ctk.set_appearance_mode("dark")
@@ -268,6 +271,7 @@ def create_ui_components(root, response_manager, transcriber, audio_queue):
     main_control_frame.grid_rowconfigure(0, minsize=25)  # 原来是weight=1
     main_control_frame.grid_rowconfigure(1, minsize=25)
     main_control_frame.grid_rowconfigure(2, minsize=25)
+    main_control_frame.grid_rowconfigure(3, minsize=25)
 
     for i in range(4):
         main_control_frame.grid_columnconfigure(i, weight=1)
@@ -388,7 +392,7 @@ def create_ui_components(root, response_manager, transcriber, audio_queue):
 
     # === Column 2: Action Buttons ===
     buttons_data = [
-        ("Clear Transcript", lambda: clear_context(transcriber, audio_queue, transcript_ui), "#1f538d"),
+        ("Clear Transcript", lambda: clear_context(transcriber, audio_queues, transcript_ui), "#1f538d"),
         ("Export Conversation", export_responses, "#1B4332"),
         ("Pop Up", None, "#1B4332")
     ]
@@ -508,6 +512,40 @@ def create_ui_components(root, response_manager, transcriber, audio_queue):
     interval_dropdown.grid(row=2, column=2, padx=(100, 5), pady=2, sticky="w")
     interval_dropdown.set(saved_interval)
 
+    # ASR Model
+    asr_model_label = ctk.CTkLabel(
+        main_control_frame,
+        text="ASR Model:",
+        font=("Arial", 12)
+    )
+    asr_model_label.grid(row=3, column=2, padx=5, pady=2, sticky="w")
+
+    saved_asr_model = (settings_manager.get_setting("asr_model")
+                       or TranscriberModels.load_config().get("ASR_MODEL", "FunASR"))
+
+    def switch_asr_model(value):
+        # 模型加载耗时，在后台线程中切换；之前的后端保留在注册表中，切换回来无需重新加载
+        try:
+            transcriber.switch_model(value)
+            settings_manager.update_setting("asr_model", value)
+        except Exception as e:
+            print(f"[ASR] Failed to switch model to {value}: {e}")
+
+    def on_asr_model_change(value):
+        threading.Thread(target=switch_asr_model, args=(value,), daemon=True).start()
+        asr_model_label.configure(text_color="#639cdc")
+        root.after(500, lambda: asr_model_label.configure(text_color="#FFFCF2"))
+
+    asr_model_dropdown = ctk.CTkOptionMenu(
+        main_control_frame,
+        values=list(ASRFactory.SYSTEMS),
+        width=130,
+        command=on_asr_model_change,
+        state="disabled" if '--api' in sys.argv else "normal"
+    )
+    asr_model_dropdown.grid(row=3, column=2, padx=(100, 5), pady=2, sticky="w")
+    asr_model_dropdown.set(saved_asr_model)
+
     # === Column 4: Window Controls ===
     # Create a frame for the first row controls
     controls_frame = ctk.CTkFrame(main_control_frame, fg_color="transparent")
@@ -533,6 +571,26 @@ def create_ui_components(root, response_manager, transcriber, audio_queue):
     )
     record_only_checkbox.pack(side="left", padx=(0, 5))  # 减少右侧padding
 
+    # Speculative Checkbox：Speaker的partial结果稳定后提前生成回复
+    speculative_var = tk.BooleanVar(value=settings_manager.get_setting("speculative_mode"))
+
+    def toggle_speculative():
+        is_speculative = speculative_var.get()
+        SystemConfig.set_speculative_mode(is_speculative)
+        settings_manager.update_setting("speculative_mode", is_speculative)
+
+    speculative_checkbox = ctk.CTkCheckBox(
+        controls_frame,
+        text="Speculative",
+        variable=speculative_var,
+        command=toggle_speculative,
+        width=100,
+        height=button_height,
+        checkbox_width=16,
+        checkbox_height=16
+    )
+    speculative_checkbox.pack(side="left", padx=(0, 5))
+
     # Topmost Button
     topmost_var = tk.BooleanVar(value=settings_manager.get_setting("window_topmost"))
 
@@ -635,30 +693,59 @@ def main():
         return
 
     TemplateManager.ensure_template_directories()
-    audio_queue = queue.Queue()
+
+    # 创建设置管理器实例；音频相关的设置需要在创建队列和录音器之前应用
+    settings_manager = SettingsManager()
+    AudioConfig.set_streaming_mode(settings_manager.get_setting("streaming_mode"))
+    AudioConfig.set_stream_window(settings_manager.get_setting("stream_window"))
+    AudioConfig.set_vad_gate(settings_manager.get_setting("vad_gate"))
+    AudioConfig.set_endpoint_mode(settings_manager.get_setting("endpoint_mode"))
+    AudioConfig.set_audio_queue_policy(settings_manager.get_setting("audio_queue_size"),
+                                       settings_manager.get_setting("audio_queue_policy"))
+
+    # 每个音频源一个有界队列，互不阻塞；ASR跟不上时合并积压的chunks
+    audio_queues = {
+        source_name: CoalescingAudioQueue(AudioConfig.get_audio_queue_size(), AudioConfig.get_audio_queue_policy())
+        for source_name in ("You", "Speaker")
+    }
 
     user_audio_recorder = AudioRecorder.DefaultMicRecorder()
-    user_audio_recorder.record_into_queue(audio_queue)
+    user_audio_recorder.record_into_queue(audio_queues[user_audio_recorder.source_name])
 
     time.sleep(2)
 
     speaker_audio_recorder = AudioRecorder.DefaultSpeakerRecorder()
-    speaker_audio_recorder.record_into_queue(audio_queue)
+    speaker_audio_recorder.record_into_queue(audio_queues[speaker_audio_recorder.source_name])
 
-    model = TranscriberModels.get_model('--api' in sys.argv)
+    model = TranscriberModels.get_model('--api' in sys.argv, settings_manager.get_setting("asr_model") or None)
 
     # 创建ResponseManager实例
     response_manager = ResponseManager()
 
-    transcriber = AudioTranscriber(user_audio_recorder.source, speaker_audio_recorder.source, model,response_manager)
-    transcribe = threading.Thread(target=transcriber.transcribe_audio_queue, args=(audio_queue,))
-    transcribe.daemon = True
-    transcribe.start()
-
-    responder = GPTResponder(response_manager)
+    transcriber = AudioTranscriber(user_audio_recorder, speaker_audio_recorder, model,response_manager)
+    # 每个音频源一个转写线程，Speaker的延迟不受麦克风活动影响
+    for source_name, audio_queue in audio_queues.items():
+        transcribe = threading.Thread(target=transcriber.transcribe_audio_queue, args=(audio_queue,),
+                                      name=f"transcribe-{source_name}")
+        transcribe.daemon = True
+        transcribe.start()
+
+    # 定期输出各组件的统计（ASR调度、音频队列、缓存、回复生成），退出时再输出一次
+    stats_reporter = StatsReporter()
+    stats_reporter.add("ASR scheduler", transcriber.scheduler.get_stats)
+    for source_name, audio_queue in audio_queues.items():
+        stats_reporter.add(f"{source_name} audio queue", audio_queue.get_stats)
+    if isinstance(model, TranscriberModels.CachedTranscriber):
+        stats_reporter.add("ASR cache", model.get_stats)
+    stats_reporter.add("ASR models", TranscriberModels.registry.get_stats)
+    stats_reporter.start()
+
+    responder = GPTResponder(response_manager, **TranscriberModels.load_config().get("OpenAIChat", {}))
     respond = threading.Thread(target=responder.respond_to_transcriber, args=(transcriber,))
     respond.daemon = True
     respond.start()
+    stats_reporter.add("Generation", responder.get_generation_stats)
+    stats_reporter.add("Speculation", responder.get_speculation_stats)
 
     #monitor = threading.Thread(target=transcriber.self_check)
     #monitor.daemon = True
@@ -676,11 +763,8 @@ def main():
         buffer_dropdown,
         update_button,
         export_button
-    ) = create_ui_components(root, response_manager, transcriber, audio_queue)
-
+    ) = create_ui_components(root, response_manager, transcriber, audio_queues)
 
-    # 创建设置管理器实例
-    settings_manager = SettingsManager()
     
     # 加载窗口设置
     saved_opacity = settings_manager.get_setting("window_opacity")
@@ -690,6 +774,8 @@ def main():
     root.attributes('-topmost', saved_topmost)  # 设置置顶状态   
     
     SystemConfig.set_record_only_mode(settings_manager.get_setting("record_only_mode"))
+    SystemConfig.set_speculative_mode(settings_manager.get_setting("speculative_mode"))
+    SystemConfig.set_speculative_delay(settings_manager.get_setting("speculative_delay"))
  
 
     # 允许窗口在任务栏显示
@@ -702,7 +788,7 @@ def main():
     root.grid_columnconfigure(1, weight=3)
 
     clear_transcript_button.configure(
-        command=lambda: clear_context(transcriber, audio_queue, transcript_ui)
+        command=lambda: clear_context(transcriber, audio_queues, transcript_ui)
     )
     def show_popup():
         try:
@@ -738,6 +824,7 @@ def main():
     TemplateManager.initialize_default_role()
 
     root.mainloop()
+    stats_reporter.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,181 @@
+#src/ASRAutotune.py
+"""
+在本机上为当前ASR后端选择线程数和实例数
+
+用法：
+    python -m src.ASRAutotune [--audio sample.wav] [--rtf 0.5] [--sources 2]
+
+对每组 (每实例线程数, 实例数) 用 sources 个并发音频源反复识别样本短语，
+在满足实时率（处理耗时/音频时长 <= rtf）的组合中选择p95延迟最低的一组，
+写入项目根目录的 conf.autotune.yaml，运行时由 TranscriberModels.load_config 读取。
+
+解码耗时与音频内容有关（token数、beam search、非语音上的幻觉/循环），需要真实语音样本：
+用 --audio 指定，或放在 resources/audio/autotune_sample.wav。没有样本时用合成信号测试，
+只输出结果，不写入 conf.autotune.yaml。
+"""
+
+import argparse
+import os
+import queue
+import threading
+import time
+import wave
+import numpy as np
+import yaml
+from .config import PathConfig
+from .asr.asr_factory import ASRFactory
+from .TranscriberModels import load_config, AUTOTUNE_FILE
+
+SAMPLE_RATE = 16000
+SAMPLE_AUDIO = os.path.join("resources", "audio", "autotune_sample.wav")
+CLIP_SECONDS = 4.0   # 与流式转写的典型窗口相近的短语长度
+ROUNDS = 3           # 每个音频源识别样本短语的轮数
+
+# 各后端控制CPU线程数的配置项
+THREAD_PARAMS = {
+    "FunASR": "ncpu",
+    "SenseVoiceONNX": "intra_op_threads",
+    "Faster-Whisper": "cpu_threads",
+    "WhisperCPP": "n_threads",
+}
+
+
+def load_sample_audio(path=None):
+    """
+    读取16kHz单声道样本；没有样本文件时合成一段类语音信号（基频+共振峰+音节包络）
+
+    Returns:
+        (audio, synthetic): synthetic为True表示使用了合成信号
+    """
+    path = path or os.path.join(PathConfig.get_project_root(), SAMPLE_AUDIO)
+    if os.path.exists(path):
+        with wave.open(path, "rb") as wf:
+            if wf.getframerate() != SAMPLE_RATE or wf.getsampwidth() != 2:
+                raise ValueError(f"{path} must be 16kHz 16-bit PCM")
+            data = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+            data = data.reshape(-1, wf.getnchannels()).mean(axis=1)
+        return (data / 32768.0).astype(np.float32), False
+
+    print(f"[Autotune] WARNING: {path} not found, using synthesized speech-like audio. "
+          "Decoder cost on it differs from real speech; results will not be written.")
+    rng = np.random.default_rng(0)
+    t = np.arange(int(20 * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 120 + 30 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 20))
+    formants = sum(np.sin(2 * np.pi * f * t) * 0.2 for f in (700, 1200, 2600))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) ** 2
+    audio = (voiced + formants * voiced) * syllables + 0.01 * rng.standard_normal(len(t))
+    return (0.3 * audio / np.abs(audio).max()).astype(np.float32), True
+
+
+def candidate_settings(cpu_count, sources):
+    """(每实例线程数, 实例数) 组合，总线程数不超过CPU核数"""
+    threads = sorted({t for t in (1, 2, 4, 6, 8, 12, 16, cpu_count) if t <= cpu_count})
+    return [(t, w) for w in range(1, sources + 1) for t in threads if t * w <= cpu_count]
+
+
+def benchmark(backend, backend_config, threads, workers, clips, sources):
+    """返回 (p95延迟, 最差音频源的实时率)"""
+    config = dict(backend_config, **{THREAD_PARAMS[backend]: threads})
+    instances = queue.Queue()
+    for _ in range(workers):
+        instances.put(ASRFactory.get_asr_system(backend, **config))
+
+    # 预热一次，排除首次调用的初始化开销
+    model = instances.get()
+    model.transcribe_np(clips[0])
+    instances.put(model)
+
+    # 延迟从请求实例开始计时，包含等待空闲实例的时间；实时率按每个音频源的墙钟时间计算
+    latencies = []
+    wall = [0.0] * sources
+    lock = threading.Lock()
+
+    def run_source(index):
+        source_start = time.perf_counter()
+        for _ in range(ROUNDS):
+            for clip in clips:
+                start = time.perf_counter()
+                model = instances.get()
+                try:
+                    model.transcribe_np(clip)
+                finally:
+                    instances.put(model)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+        wall[index] = time.perf_counter() - source_start
+
+    source_threads = [threading.Thread(target=run_source, args=(i,)) for i in range(sources)]
+    for thread in source_threads:
+        thread.start()
+    for thread in source_threads:
+        thread.join()
+
+    audio_seconds = ROUNDS * sum(len(clip) for clip in clips) / SAMPLE_RATE
+    return float(np.percentile(latencies, 95)), max(wall) / audio_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ASR thread/worker settings on this host")
+    parser.add_argument("--audio", help="16kHz 16-bit WAV used for the benchmark")
+    parser.add_argument("--rtf", type=float, default=0.5, help="required real-time factor (processing / audio time)")
+    parser.add_argument("--sources", type=int, default=2, help="concurrent audio sources (You + Speaker)")
+    parser.add_argument("--dry-run", action="store_true", help="print the result without writing it")
+    args = parser.parse_args()
+
+    config = load_config()
+    backend = config.get("ASR_MODEL", "FunASR")
+    if backend not in THREAD_PARAMS:
+        print(f"[Autotune] {backend} has no local thread setting to tune")
+        return
+    backend_config = dict(config.get(backend) or {})
+
+    audio, synthetic = load_sample_audio(args.audio)
+    clip_samples = int(CLIP_SECONDS * SAMPLE_RATE)
+    clips = [audio[i:i + clip_samples] for i in range(0, len(audio) - clip_samples + 1, clip_samples)] or [audio]
+
+    cpu_count = os.cpu_count() or 1
+    results = []
+    for threads, workers in candidate_settings(cpu_count, args.sources):
+        try:
+            p95, rtf = benchmark(backend, backend_config, threads, workers, clips, args.sources)
+        except Exception as e:
+            print(f"[Autotune] threads={threads} workers={workers} failed: {e}")
+            continue
+        results.append({"threads": threads, "workers": workers, "p95": round(p95, 4), "rtf": round(rtf, 4)})
+        print(f"[Autotune] threads={threads} workers={workers}: p95={p95 * 1000:.0f}ms rtf={rtf:.3f}")
+
+    if not results:
+        print("[Autotune] No setting could be benchmarked")
+        return
+    feasible = [r for r in results if r["rtf"] <= args.rtf]
+    best = min(feasible, key=lambda r: r["p95"]) if feasible else min(results, key=lambda r: r["rtf"])
+    if not feasible:
+        print(f"[Autotune] No setting reaches rtf {args.rtf}; using the fastest one")
+    print(f"[Autotune] Best for {backend} on {cpu_count} CPUs: threads={best['threads']} workers={best['workers']}")
+
+    if args.dry_run:
+        return
+    if synthetic:
+        print("[Autotune] WARNING: not writing conf.autotune.yaml, the benchmark ran on synthesized audio. "
+              f"Re-run with --audio <16kHz speech WAV> or add {SAMPLE_AUDIO}.")
+        return
+    tuned = {
+        "backend": backend,
+        "ASR_WORKERS": best["workers"],
+        backend: {THREAD_PARAMS[backend]: best["threads"]},
+        "cpu_count": cpu_count,
+        "target_rtf": args.rtf,
+        "results": results,
+    }
+    path = os.path.join(PathConfig.get_project_root(), AUTOTUNE_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Generated by `python -m src.ASRAutotune`; overrides conf.yaml on this host.\n")
+        yaml.safe_dump(tuned, f, sort_keys=False)
+    print(f"[Autotune] Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#src/ASRScheduler.py
+
+import heapq
+import itertools
+import threading
+import time
+
+# 数字越小优先级越高：只有Speaker的文本会触发GPT回复
+SOURCE_PRIORITIES = {"Speaker": 0, "You": 1}
+# 任务从提交到开始执行的期限（秒），None表示没有期限
+SOURCE_DEADLINES = {"Speaker": None, "You": 2.0}
+# 过期后可以直接跳过的音频源
+SKIPPABLE_SOURCES = ("You",)
+BATCH_WINDOW = 0.03    # 秒，等待其他音频源的任务凑成一批的最长时间
+MAX_BATCH = 4          # 单次批量推理的最大任务数
+ACTIVE_SOURCE_SECONDS = 1.0  # 其他音频源在这段时间内提交过任务才值得等待凑批
+
+
+class ASRJobSkipped(Exception):
+    """任务因超过期限被调度器跳过"""
+
+
+class ASRJob:
+    def __init__(self, source, priority, deadline, skippable, func, args, batch_func=None):
+        self.source = source
+        self.priority = priority
+        self.deadline = deadline
+        self.skippable = skippable
+        self.func = func
+        self.args = args
+        self.batch_func = batch_func  # 接收输入列表、返回结果列表的批量函数
+        self.deferred = False
+        self.skipped = False
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+
+    def finish(self, result=None, error=None, skipped=False):
+        self.result = result
+        self.error = error
+        self.skipped = skipped
+        self._done.set()
+
+    def wait(self):
+        """阻塞直到任务完成，返回识别结果"""
+        self._done.wait()
+        if self.skipped:
+            raise ASRJobSkipped(f"{self.source} ASR job skipped after deadline")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class ASRScheduler:
+    """
+    带优先级和期限的ASR任务调度器
+
+    - 固定数量的执行线程，限制同时进行的ASR任务数（max_concurrent）。
+    - 按 (优先级, 期限, 提交顺序) 出队：Speaker 总是先于 You。
+    - You 的任务在CPU紧张时被推迟；等待超过期限的任务直接跳过，
+      下一个chunk到来时会连同新音频一起重新识别。
+    - 可批量的任务（submit_batched）在短窗口内合并为一次批量推理，结果按任务分发。
+      只有其他音频源近期也在提交任务时才等待窗口，单个任务不增加延迟。
+    """
+
+    def __init__(self, max_concurrent=1, priorities=None, deadlines=None, skippable=SKIPPABLE_SOURCES):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.priorities = priorities or SOURCE_PRIORITIES
+        self.deadlines = deadlines or SOURCE_DEADLINES
+        self.skippable = set(skippable)
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._stats = {"submitted": 0, "completed": 0, "deferred": 0, "skipped": 0,
+                       "batches": 0, "batched_jobs": 0}
+        self._last_submit = {}
+
+        for i in range(self.max_concurrent):
+            worker = threading.Thread(target=self._worker, name=f"asr-worker-{i}")
+            worker.daemon = True
+            worker.start()
+
+    def submit(self, source, func, *args) -> ASRJob:
+        """提交一个ASR任务，func(*args)在执行线程中调用"""
+        return self._submit(source, func, args)
+
+    def submit_batched(self, source, batch_func, item) -> ASRJob:
+        """提交一个可批量的ASR任务，batch_func([item, ...])返回对应的结果列表"""
+        return self._submit(source, None, (item,), batch_func)
+
+    def run(self, source, func, *args):
+        """提交任务并等待结果；被跳过时抛出ASRJobSkipped"""
+        return self.submit(source, func, *args).wait()
+
+    def run_batched(self, source, batch_func, item):
+        """提交可批量的任务并等待结果；被跳过时抛出ASRJobSkipped"""
+        return self.submit_batched(source, batch_func, item).wait()
+
+    def _submit(self, source, func, args, batch_func=None) -> ASRJob:
+        deadline_seconds = self.deadlines.get(source)
+        deadline = time.monotonic() + deadline_seconds if deadline_seconds is not None else float("inf")
+        job = ASRJob(source, self.priorities.get(source, len(self.priorities)), deadline,
+                     source in self.skippable, func, args, batch_func)
+        with self._cond:
+            heapq.heappush(self._heap, (job.priority, job.deadline, next(self._counter), job))
+            self._stats["submitted"] += 1
+            self._last_submit[source] = time.monotonic()
+            self._cond.notify()
+        return job
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._heap)
+        return stats
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                job = heapq.heappop(self._heap)[-1]
+                # 被更高优先级任务插队的低优先级任务记为推迟
+                for entry in self._heap:
+                    waiting = entry[-1]
+                    if waiting.priority > job.priority and not waiting.deferred:
+                        waiting.deferred = True
+                        self._stats["deferred"] += 1
+                expired = job.skippable and time.monotonic() > job.deadline
+                if expired:
+                    self._stats["skipped"] += 1
+                    skipped_count = self._stats["skipped"]
+
+            if expired:
+                print(f"[ASR] Skipped stale {job.source} job under load (skipped: {skipped_count})")
+                job.finish(skipped=True)
+                continue
+
+            if job.batch_func is None:
+                try:
+                    job.finish(result=job.func(*job.args))
+                except Exception as e:
+                    job.finish(error=e)
+                completed = 1
+            else:
+                completed = self._run_batch([job] + self._collect_batch(job))
+            with self._cond:
+                self._stats["completed"] += completed
+
+    def _collect_batch(self, job):
+        """收集与job使用同一批量函数的待处理任务，必要时等待一个短窗口"""
+        now = time.monotonic()
+        others_active = any(source != job.source and now - submitted < ACTIVE_SOURCE_SECONDS
+                            for source, submitted in self._last_submit.items())
+        window_end = now + (BATCH_WINDOW if others_active else 0)
+        batch = []
+        with self._cond:
+            while True:
+                remaining = []
+                for entry in self._heap:
+                    waiting = entry[-1]
+                    if len(batch) < MAX_BATCH - 1 and waiting.batch_func == job.batch_func:
+                        if waiting.skippable and time.monotonic() > waiting.deadline:
+                            self._stats["skipped"] += 1
+                            waiting.finish(skipped=True)
+                        else:
+                            batch.append(waiting)
+                    else:
+                        remaining.append(entry)
+                if len(remaining) != len(self._heap):
+                    heapq.heapify(remaining)
+                    self._heap = remaining
+                timeout = window_end - time.monotonic()
+                if len(batch) >= MAX_BATCH - 1 or timeout <= 0:
+                    return batch
+                self._cond.wait(timeout)
+
+    def _run_batch(self, batch):
+        """执行一次批量推理并把结果分发给各任务"""
+        try:
+            results = batch[0].batch_func([job.args[0] for job in batch])
+            for job, result in zip(batch, results):
+                job.finish(result=result)
+        except Exception as e:
+            for job in batch:
+                job.finish(error=e)
+        if len(batch) > 1:
+            with self._cond:
+                self._stats["batches"] += 1
+                self._stats["batched_jobs"] += len(batch)
+        return len(batch)
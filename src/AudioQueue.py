@@ -0,0 +1,80 @@
+#src/AudioQueue.py
+
+import queue
+import numpy as np
+
+QUEUE_POLICIES = ("merge", "drop_oldest", "drop_newest")
+
+
+class CoalescingAudioQueue(queue.Queue):
+    """
+    有界的音频chunk队列，ASR慢于实时时合并积压的chunks
+
+    - put 永不阻塞采集线程；队列满时按policy处理：
+        merge       把最老的两个chunk拼接为一个（不丢音频）
+        drop_oldest 丢弃最老的chunk
+        drop_newest 丢弃新来的chunk
+    - get_all 一次取出所有积压的chunks，转写线程只为最新的音频做一次识别，
+      中间被取代的partial不再单独识别。
+    队列元素与原来相同：(source_name, data, time_spoken)；data为None表示短语结束标记。
+    """
+
+    def __init__(self, maxsize=16, policy="merge"):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown audio queue policy: {policy}")
+        if policy == "merge" and 0 < maxsize < 2:
+            raise ValueError("The merge policy needs a queue size of at least 2")
+        super().__init__(maxsize)
+        self.policy = policy
+        self._stats = {"merged": 0, "dropped": 0, "coalesced": 0}
+
+    def put(self, item, block=True, timeout=None):
+        with self.not_empty:
+            if 0 < self.maxsize <= self._qsize():
+                if self.policy == "drop_newest":
+                    self._stats["dropped"] += 1
+                    return
+                if self.policy == "drop_oldest":
+                    self._drop_oldest()
+                else:
+                    self._merge_oldest()
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def _drop_oldest(self):
+        """丢弃最老的音频chunk，短语结束标记(data为None)保留"""
+        for i, (_, data, _) in enumerate(self.queue):
+            if data is not None:
+                del self.queue[i]
+                self._stats["dropped"] += 1
+                return
+
+    def _merge_oldest(self):
+        """拼接最老的两个相邻音频chunk，不跨越短语结束标记"""
+        for i in range(len(self.queue) - 1):
+            who_spoke, first, _ = self.queue[i]
+            _, second, time_spoken = self.queue[i + 1]
+            if first is not None and second is not None:
+                self.queue[i] = (who_spoke, np.concatenate((first, second)), time_spoken)
+                del self.queue[i + 1]
+                self._stats["merged"] += 1
+                return
+        self._drop_oldest()
+
+    def get_all(self):
+        """阻塞直到有数据，然后取出队列中的全部chunks"""
+        with self.not_empty:
+            while not self._qsize():
+                self.not_empty.wait()
+            items = list(self.queue)
+            self.queue.clear()
+            self._stats["coalesced"] += len(items) - 1
+            self.not_full.notify_all()
+        return items
+
+    def get_stats(self) -> dict:
+        with self.mutex:
+            stats = dict(self._stats)
+            stats["pending"] = self._qsize()
+        return stats
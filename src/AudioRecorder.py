@@ -3,8 +3,13 @@
 import src.custom_speech_recognition as sr
 import pyaudiowpatch as pyaudio
 from datetime import datetime
+from .AudioResampler import StreamingResampler
+from .VoiceActivityGate import VoiceActivityGate
+from .config import AudioConfig
 
 RECORD_TIMEOUT = 0.6
+TARGET_SAMPLE_RATE = 16000  # 所有音频源进入转写管线前统一为16kHz单声道
+TARGET_CHANNELS = 1
 ENERGY_THRESHOLD = 100
 DYNAMIC_ENERGY_THRESHOLD = False
 #DYNAMIC_ENERGY_THRESHOLD = True
@@ -21,7 +26,22 @@ class BaseRecorder:
         self.source = source
         self.source_name = source_name
 
+        # 与AudioSource相同的格式属性，描述放入队列的音频（16kHz单声道int16）
+        self.SAMPLE_RATE = TARGET_SAMPLE_RATE
+        self.SAMPLE_WIDTH = source.SAMPLE_WIDTH
+        self.channels = TARGET_CHANNELS
+        self.resampler = StreamingResampler(source.SAMPLE_RATE, TARGET_SAMPLE_RATE, source.channels)
+
+        # VAD门控模式：能量阈值不再过滤，每个chunk都交给VAD判断
+        self.gate = None
+        if AudioConfig.get_vad_gate():
+            self.gate = VoiceActivityGate(source_name, TARGET_SAMPLE_RATE,
+                                          endpointing=AudioConfig.get_endpoint_mode() == "vad")
+            self.recorder.energy_threshold = -1
+
     def adjust_for_noise(self, device_name, msg):
+        if self.gate is not None:
+            return  # 由VAD判断语音，不需要能量阈值校准
         print(f"[INFO] Adjusting for ambient noise from {device_name}. " + msg)
         with self.source:
             self.recorder.adjust_for_ambient_noise(self.source)
@@ -29,8 +49,17 @@ class BaseRecorder:
 
     def record_into_queue(self, audio_queue):
         def record_callback(_, audio:sr.AudioData) -> None:
-            data = audio.get_raw_data()
-            audio_queue.put((self.source_name, data, datetime.utcnow()))
+            # 在采集线程中完成下混和重采样，滤波器状态跨chunk保留
+            data = self.resampler.process(audio.get_raw_data())
+            if self.gate is None:
+                audio_queue.put((self.source_name, data, datetime.utcnow()))
+                return
+            accepted, phrase_ended = self.gate.process(data)
+            if accepted:
+                audio_queue.put((self.source_name, data, datetime.utcnow()))
+            if phrase_ended:
+                # data为None的元素表示短语在真实停顿处结束
+                audio_queue.put((self.source_name, None, datetime.utcnow()))
 
         self.recorder.listen_in_background(self.source, record_callback, phrase_time_limit=RECORD_TIMEOUT)
 
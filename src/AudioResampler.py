@@ -0,0 +1,85 @@
+#src/AudioResampler.py
+
+from math import gcd
+import numpy as np
+
+HALF_TAPS = 10        # 每侧的零交叉数，与scipy.signal.resample_poly默认一致
+KAISER_BETA = 5.0
+
+
+class StreamingResampler:
+    """
+    有状态的多相(polyphase)重采样与下混
+
+    - 多声道先平均为单声道，再按 up/down 的有理比例重采样。
+    - 每个chunk末尾的输入样本和输出相位保存在状态中，
+      连续处理的chunks与一次性处理整段音频的结果一致，chunk边界没有断点。
+    - 全部运算为numpy向量化操作，只依赖numpy。
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, channels: int = 1):
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate)
+        self.channels = channels
+        divisor = gcd(self.in_rate, self.out_rate)
+        self.up = self.out_rate // divisor
+        self.down = self.in_rate // divisor
+
+        # 在上采样后的采样率上设计低通滤波器（kaiser窗sinc）
+        max_rate = max(self.up, self.down)
+        half_len = HALF_TAPS * max_rate
+        n = np.arange(-half_len, half_len + 1)
+        cutoff = 1.0 / max_rate
+        taps = cutoff * np.sinc(cutoff * n) * np.kaiser(len(n), KAISER_BETA) * self.up
+
+        # 拆分为多相滤波器组：phases[p, k] = taps[p + k * up]
+        self._taps_per_phase = -(-len(taps) // self.up)
+        taps = np.pad(taps, (0, self._taps_per_phase * self.up - len(taps)))
+        self._phases = taps.reshape(self._taps_per_phase, self.up).T.astype(np.float32)
+        self._kernel_offsets = np.arange(self._taps_per_phase)
+        self.reset()
+
+    @property
+    def passthrough(self) -> bool:
+        return self.up == self.down and self.channels == 1
+
+    def reset(self) -> None:
+        """清空滤波器状态"""
+        self._history = np.zeros(self._taps_per_phase - 1, dtype=np.float32)
+        self._consumed = 0   # 已处理的输入样本数
+        self._produced = 0   # 已输出的样本数
+
+    def process(self, data) -> np.ndarray:
+        """
+        处理一个int16 chunk（bytes或数组），返回目标采样率的单声道int16数组
+        """
+        frames = np.frombuffer(data, dtype=np.int16) if isinstance(data, (bytes, bytearray, memoryview)) else data
+        if self.passthrough:
+            return frames.reshape(-1)
+
+        frames = frames.reshape(-1, self.channels)
+        mono = frames.mean(axis=1, dtype=np.float32) if self.channels > 1 else frames[:, 0].astype(np.float32)
+        if self.up == self.down:
+            return self._to_int16(mono)
+
+        buf = np.concatenate((self._history, mono))
+        total = self._consumed + len(mono)
+        end = (total * self.up + self.down - 1) // self.down
+        positions = np.arange(self._produced, end, dtype=np.int64) * self.down
+        phase = positions % self.up
+        # buf[0]对应全局输入下标 consumed - (taps_per_phase - 1)
+        newest = positions // self.up - self._consumed + len(self._history)
+        output = np.einsum(
+            'nk,nk->n',
+            buf[newest[:, None] - self._kernel_offsets[None, :]],
+            self._phases[phase]
+        )
+
+        self._history = buf[len(buf) - len(self._history):].copy()
+        self._consumed = total
+        self._produced = end
+        return self._to_int16(output)
+
+    @staticmethod
+    def _to_int16(samples: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(samples), -32768, 32767).astype(np.int16)
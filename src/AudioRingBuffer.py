@@ -0,0 +1,77 @@
+#src/AudioRingBuffer.py
+
+from collections import deque
+import numpy as np
+
+MAX_PREROLL_CHUNKS = 10  # 与buffer_chunks的上限一致
+
+
+class AudioRingBuffer:
+    """
+    固定容量的int16音频环形缓冲区，用于存放当前短语
+
+    - 数据镜像写入两份（[0, capacity) 与 [capacity, 2*capacity)），
+      因此任意不超过容量的区间都能以连续的numpy视图返回，无需拷贝。
+    - append只拷贝新chunk本身，O(1)摊销。
+    - reset_phrase只移动短语起点，上一短语末尾的chunks直接作为预录(pre-roll)保留。
+    """
+
+    def __init__(self, capacity_frames: int, channels: int = 1):
+        self.capacity = int(capacity_frames)
+        self.channels = channels
+        self._data = np.zeros((2 * self.capacity, channels), dtype=np.int16)
+        self._written = 0        # 累计写入的帧数（绝对位置）
+        self._phrase_start = 0   # 当前短语起点（绝对位置）
+        self._chunk_starts = deque(maxlen=MAX_PREROLL_CHUNKS)  # 最近chunks的起点
+        self._chunks_in_phrase = 0  # 上次重置后新写入的chunk数
+
+    def __len__(self):
+        """当前短语的帧数"""
+        return self._written - self._phrase_start
+
+    def append(self, data) -> None:
+        """追加一个chunk（bytes或int16数组）"""
+        frames = np.frombuffer(data, dtype=np.int16) if isinstance(data, (bytes, bytearray, memoryview)) else data
+        frames = frames.reshape(-1, self.channels)
+        if len(frames) > self.capacity:
+            frames = frames[-self.capacity:]
+
+        n = len(frames)
+        pos = self._written % self.capacity
+        first = min(n, self.capacity - pos)
+        self._data[pos:pos + first] = frames[:first]
+        self._data[pos + self.capacity:pos + self.capacity + first] = frames[:first]
+        rest = n - first
+        if rest:
+            self._data[:rest] = frames[first:]
+            self._data[self.capacity:self.capacity + rest] = frames[first:]
+
+        self._chunk_starts.append(self._written)
+        self._chunks_in_phrase += 1
+        self._written += n
+        # 短语超过容量时丢弃最老的数据
+        if self._written - self._phrase_start > self.capacity:
+            self._phrase_start = self._written - self.capacity
+
+    def phrase_view(self) -> np.ndarray:
+        """返回当前短语的只读视图，shape为(frames, channels)"""
+        start = self._phrase_start % self.capacity
+        view = self._data[start:start + len(self)]
+        view.flags.writeable = False
+        return view
+
+    def reset_phrase(self, preroll_chunks: int = 0) -> None:
+        """开始新短语，保留最近preroll_chunks个chunk作为预录"""
+        preroll_chunks = min(preroll_chunks, self._chunks_in_phrase, len(self._chunk_starts))
+        if preroll_chunks > 0:
+            start = max(self._chunk_starts[-preroll_chunks], self._written - self.capacity)
+        else:
+            start = self._written
+        self._phrase_start = start
+        self._chunks_in_phrase = 0
+
+    def clear(self) -> None:
+        """清空短语和预录"""
+        self._phrase_start = self._written
+        self._chunk_starts.clear()
+        self._chunks_in_phrase = 0
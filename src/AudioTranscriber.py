@@ -2,7 +2,6 @@
 
 #import whisper
 import uuid
-import torch
 import wave
 import os
 import threading
@@ -14,16 +13,22 @@ import pyaudiowpatch as pyaudio
 from heapq import merge
 from datetime import datetime
 import time
+import numpy as np
 from .config import AudioConfig, SystemConfig
+from .PhraseStreamer import PhraseStreamer, BackendPhraseStreamer
+from .AudioRingBuffer import AudioRingBuffer
+from .ASRScheduler import ASRScheduler, ASRJobSkipped
 
 
 
 PHRASE_TIMEOUT = 5.2
 MAX_PHRASE_TIMEOUT = 30.2
 MAX_PHRASES = 9999
+ASR_SAMPLE_RATE = 16000  # ASR模型需要的采样率，满足时走内存路径
+PHRASE_BUFFER_SECONDS = 60  # 短语环形缓冲区容量：最长短语超时(50s)加上预录chunks
 
 class AudioTranscriber:
-    def __init__(self, mic_source, speaker_source, model, response_manager):
+    def __init__(self, mic_source, speaker_source, model, response_manager, scheduler=None):
         # 添加response_manager
         self.response_manager = response_manager
         self.transcript_data = {"You": [], "Speaker": []}
@@ -34,78 +39,274 @@ class AudioTranscriber:
         }        
         self.len_speaker = 0
         self.transcript_changed_event = threading.Event()
+        # 每个音频源有独立的转写线程，共享的transcript数据需要加锁
+        self._transcript_lock = threading.Lock()
         self.audio_model = model
+        # ASR任务调度：Speaker优先，并发数与模型实例数一致
+        self.scheduler = scheduler or ASRScheduler(max_concurrent=getattr(model, "size", 1))
         self.audio_sources = {
             "You": {
+                "name": "You",
                 "sample_rate": mic_source.SAMPLE_RATE,
                 "sample_width": mic_source.SAMPLE_WIDTH,
                 "channels": mic_source.channels,
-                "last_sample": bytes(),
-                "saved_sample": bytes(),
-                "chunks_buffer": [],  # 使用列表存储chunks
+                "buffer": AudioRingBuffer(mic_source.SAMPLE_RATE * PHRASE_BUFFER_SECONDS, mic_source.channels),
                 "last_spoken": None,
                 "first_spoken": None,
                 "new_phrase": True,
-                "process_data_func": self.process_mic_data
+                "process_data_func": self.process_mic_data,
+                "partial_text": '',  # 当前短语最近一次的识别结果
+                "partial_changed": 0.0,  # partial_text最近一次变化的时间（monotonic）
+                "dirty": False,      # 缓冲区中是否有尚未识别的新音频
+                "streamer": None
             },
             "Speaker": {
+                "name": "Speaker",
                 "sample_rate": speaker_source.SAMPLE_RATE,
                 "sample_width": speaker_source.SAMPLE_WIDTH,
                 "channels": speaker_source.channels,
-                "last_sample": bytes(),
-                "saved_sample": bytes(),
-                "chunks_buffer": [],  # 使用列表存储chunks
+                "buffer": AudioRingBuffer(speaker_source.SAMPLE_RATE * PHRASE_BUFFER_SECONDS, speaker_source.channels),
                 "last_spoken": None,
                 "first_spoken": None,
                 "new_phrase": True,
-                "process_data_func": self.process_speaker_data
+                "process_data_func": self.process_speaker_data,
+                "partial_text": '',  # 当前短语最近一次的识别结果
+                "partial_changed": 0.0,  # partial_text最近一次变化的时间（monotonic）
+                "dirty": False,      # 缓冲区中是否有尚未识别的新音频
+                "streamer": None
             }
         }
+        for source_info in self.audio_sources.values():
+            source_info["streamer"] = self._create_streamer(source_info)
+
+    def _create_streamer(self, source_info):
+        """
+        后端支持流式会话（如whisper.cpp）时使用后端的会话，只送入新增音频；
+        否则用PhraseStreamer重新识别尾部窗口
+        """
+        if (getattr(self.audio_model, "supports_streaming", False)
+                and source_info["sample_rate"] == ASR_SAMPLE_RATE
+                and source_info["channels"] == 1):
+            stream = self.audio_model.create_stream(
+                lambda text, info=source_info: self._on_stream_segment(info, text))
+            return BackendPhraseStreamer(
+                stream,
+                lambda frames, info=source_info, stream=stream: self.scheduler.run(
+                    info["name"], stream.feed,
+                    np.multiply(frames.reshape(-1), 1.0 / 32768.0, dtype=np.float32)),
+                (lambda info=source_info, stream=stream: self.scheduler.run(info["name"], stream.finalize))
+                if hasattr(stream, "finalize") else None
+            )
+        return PhraseStreamer(
+            lambda frames, info=source_info: self._transcribe_frames(info, frames),
+            source_info["sample_rate"],
+            window_seconds=AudioConfig.get_stream_window()
+        )
+
+    def _on_stream_segment(self, source_info, text):
+        """
+        后端流式会话每解码出一段就回调，立即更新当前短语在transcript中的文本，
+        不等整个feed返回。新短语的插入（及其response）仍由转写线程完成
+        """
+        with self._transcript_lock:
+            if not text or source_info["new_phrase"] or not self.transcript_data[source_info["name"]]:
+                return
+            if text != source_info["partial_text"]:
+                source_info["partial_changed"] = time.monotonic()
+            source_info["partial_text"] = text
+            self.update_transcript(source_info["name"], text, source_info["last_spoken"])
+
+    def switch_model(self, asr_model):
+        """
+        切换ASR后端（模型加载可能需要较长时间，应在后台线程调用）
+
+        新后端是否支持流式会话可能不同，各音频源的streamer按新后端重新创建
+        """
+        self.audio_model.switch_model(asr_model)
+        for source_info in self.audio_sources.values():
+            streamer = source_info["streamer"]
+            source_info["streamer"] = self._create_streamer(source_info)
+            if hasattr(streamer, "close"):
+                streamer.close()
+        print(f"[ASR] Switched model to {asr_model}")
 
     def transcribe_audio_queue(self, audio_queue):
+        """
+        转写一个音频源的队列；每个音频源应在自己的线程中调用
+
+        audio_queue为CoalescingAudioQueue：积压的chunks一次全部取出写入缓冲区，
+        只对最新的音频做一次识别
+        """
         while True:
             #print("Debug: "+ "-----" +"\n")
-            who_spoke, data, time_spoken = audio_queue.get()
-            self.update_last_sample_and_phrase_status(who_spoke, data, time_spoken)
-            source_info = self.audio_sources[who_spoke]
-            text = ''
+            pending = None
+            for who_spoke, data, time_spoken in audio_queue.get_all():
+                if data is None:
+                    # VAD在真实停顿处结束了短语，先处理完已有音频
+                    self._process_phrase(who_spoke, time_spoken, phrase_ended=True)
+                    pending = None
+                else:
+                    self.update_last_sample_and_phrase_status(who_spoke, data, time_spoken)
+                    pending = (who_spoke, time_spoken)
+            if pending:
+                self._process_phrase(*pending)
+
+    def _process_phrase(self, who_spoke, time_spoken, phrase_ended=False):
+        """转写当前短语并更新transcript；phrase_ended表示VAD检测到短语结束"""
+        source_info = self.audio_sources[who_spoke]
+        if phrase_ended and not source_info["dirty"]:
+            # 结束标记之前没有新音频，沿用最近一次的识别结果
+            text = source_info["partial_text"]
+        else:
+            text = self._transcribe_phrase(source_info)
+        if phrase_ended and text is not None and AudioConfig.get_streaming_mode():
+            text = self._finalize_stream(source_info, text)
+        if text is None:
+            # 任务被调度器跳过，音频保留在缓冲区中，下一个chunk时一起识别
+            if not phrase_ended:
+                return
+            text = source_info["partial_text"]
+        else:
+            if text != source_info["partial_text"]:
+                source_info["partial_changed"] = time.monotonic()
+            source_info["partial_text"] = text
+            source_info["dirty"] = False
+
+        if text != '' and text.lower() != 'you':
+            print("Catching: "+ text+"\n")
+            ## if text is end of 指定符号，则设定为new phrase
+            if phrase_ended or self._phrase_timed_out(source_info, time_spoken):
+                print ("new phrase......\n")
+                source_info["new_phrase"] = True
+                text = self._finalize_phrase(source_info, text)
+                #if who_spoke.lower() == 'speaker':
+                    #self.transcript_changed_event.set()
+            with self._transcript_lock:
+                self.update_transcript(who_spoke, text, time_spoken)
+        else:
+            print("\r "+who_spoke+" text: Null, New_Phrase:"+str(source_info["new_phrase"])+"\r\n")
+            #self.transcript_changed_event.wait(1.5)
+
+        if phrase_ended:
+            # 在停顿处结束的短语不需要预录，下一个短语从下一段语音开始
+            source_info["buffer"].reset_phrase(0)
+            source_info["streamer"].reset()
+            source_info["first_spoken"] = None
+            source_info["partial_text"] = ''
+
+    def _finalize_stream(self, source_info, text):
+        """短语结束时取回流式会话的最终文本（尚未解码的尾部音频、异步到达的最终结果）"""
+        if not hasattr(source_info["streamer"], "finalize"):
+            return text
+        try:
+            return source_info["streamer"].finalize() or text
+        except ASRJobSkipped:
+            return text
+        except Exception as e:
+            print(e)
+            return text
+
+    def _phrase_timed_out(self, source_info, time_spoken):
+        """
+        墙钟超时判断。VAD端点模式下短语在停顿处结束，
+        这里只作为短语长度上限（MAX_PHRASE_TIMEOUT），限制单个短语的ASR开销
+        """
+        if not source_info["first_spoken"]:
+            return False
+        if AudioConfig.get_endpoint_mode() == "vad":
+            timeout = MAX_PHRASE_TIMEOUT
+        else:
+            timeout = AudioConfig.get_phrase_timeout()
+        return time_spoken - source_info["first_spoken"] > timedelta(seconds=timeout)
+
+    def _finalize_phrase(self, source_info, text):
+        """
+        级联模式下用准确模型重新识别完整短语，作为保存和发送给GPT的最终文本；
+        准确模型不可用、任务被跳过或结果为空时沿用partial文本
+        """
+        if (not hasattr(self.audio_model, "transcribe_final")
+                or source_info["sample_rate"] != ASR_SAMPLE_RATE
+                or source_info["channels"] != 1):
+            return text
+        frames = source_info["buffer"].phrase_view()
+        try:
+            audio = np.multiply(frames.reshape(-1), 1.0 / 32768.0, dtype=np.float32)
+            final_text = self.scheduler.run(source_info["name"], self.audio_model.transcribe_final, audio)
+        except ASRJobSkipped:
+            return text
+        except Exception as e:
+            print(e)
+            return text
+        if final_text:
+            print("Final: " + final_text + "\n")
+            source_info["partial_text"] = final_text
+            return final_text
+        return text
+
+    def _transcribe_phrase(self, source_info):
+        """转写当前短语；流式模式下只重新识别尾部窗口。任务被跳过时返回None"""
+        # 直接使用环形缓冲区上的视图，不复制数据
+        frames = source_info["buffer"].phrase_view()
+        try:
+            if not AudioConfig.get_streaming_mode():
+                return self._transcribe_frames(source_info, frames)
+            return source_info["streamer"].update(frames)
+        except ASRJobSkipped:
+            return None
+        except Exception as e:
+            print(e)
+            return ''
+
+    def _transcribe_frames(self, source_info, frames):
+        """
+        转写int16音频帧
+
+        16kHz单声道且模型支持transcribe_np时，直接把float32数组交给ASR
+        （支持批量推理时经调度器合并）；否则回退到临时WAV文件
+        """
+        if (hasattr(self.audio_model, "transcribe_np")
+                and source_info["sample_rate"] == ASR_SAMPLE_RATE
+                and source_info["channels"] == 1):
             try:
-                fd, path = tempfile.mkstemp(suffix=".wav")
-                os.close(fd)
-                source_info["process_data_func"](source_info["saved_sample"], path)
-                text = self.audio_model.get_transcription(path)
+                audio = np.multiply(frames.reshape(-1), 1.0 / 32768.0, dtype=np.float32)
+                if getattr(self.audio_model, "supports_batch", False):
+                    # 同时待处理的其他音频源片段会与本片段合并为一次批量推理
+                    return self.scheduler.run_batched(source_info["name"], self.audio_model.transcribe_batch, audio)
+                return self.scheduler.run(source_info["name"], self.audio_model.transcribe_np, audio)
+            except ASRJobSkipped:
+                raise
             except Exception as e:
                 print(e)
-            finally:
+                return ''
+        return self._transcribe_wav(source_info, frames.tobytes())
+
+    def _transcribe_wav(self, source_info, data):
+        """将音频写入临时WAV文件并转写（回退路径）"""
+        text = ''
+        path = None
+        try:
+            fd, path = tempfile.mkstemp(suffix=".wav")
+            os.close(fd)
+            source_info["process_data_func"](data, path)
+            text = self.scheduler.run(source_info["name"], self.audio_model.get_transcription, path)
+        except ASRJobSkipped:
+            raise
+        except Exception as e:
+            print(e)
+        finally:
+            if path:
                 os.unlink(path)
-            if text != '' and text.lower() != 'you':
-                print("Catching: "+ text+"\n")
-                ## if text is end of 指定符号，则设定为new phrase
-                if (source_info["first_spoken"] and time_spoken - source_info["first_spoken"] > timedelta(seconds=AudioConfig.get_phrase_timeout())) :
-                    print ("new phrase......\n")
-                    source_info["new_phrase"] = True
-                    #if who_spoke.lower() == 'speaker':
-                        #self.transcript_changed_event.set()
-                self.update_transcript(who_spoke, text, time_spoken)
-            else:
-                print("\r "+who_spoke+" text: Null, New_Phrase:"+str(source_info["new_phrase"])+"\r\n")
-                #self.transcript_changed_event.wait(1.5)
+        return text
 
     def update_last_sample_and_phrase_status(self, who_spoke, data, time_spoken):
         source_info = self.audio_sources[who_spoke]
         #print("#1 "+who_spoke+" Now:"+str(time_spoken)+" First:"+str(source_info["first_spoken"])+" Last:"+str(source_info["last_spoken"])+"\r\n")
-        # 更新chunks buffer
-        max_chunks = AudioConfig.get_buffer_chunks()
-        if max_chunks > 0:  # 只在需要buffer时处理
-            source_info["chunks_buffer"].append(data)
-            # 保持buffer大小不超过限制
-            if len(source_info["chunks_buffer"]) > max_chunks:
-                source_info["chunks_buffer"].pop(0)  # 移除最老的chunk
         if source_info["first_spoken"] == None:
                 source_info["first_spoken"] = time_spoken
-        source_info["last_sample"] += data
+        # 环形缓冲区同时记录chunk边界，预录(buffer_chunks)在重置时直接复用
+        source_info["buffer"].append(data)
         source_info["last_spoken"] = time_spoken
-        source_info["saved_sample"] = source_info["last_sample"] 
+        source_info["dirty"] = True
 
     def process_mic_data(self, data, temp_file_name):
         audio_data = sr.AudioData(data, self.audio_sources["You"]["sample_rate"], self.audio_sources["You"]["sample_width"])
@@ -161,13 +362,14 @@ class AudioTranscriber:
 
     def _reset_source_info(self, source_info, time_spoken):
         """重置source_info的状态"""
-        buffered_data = b''.join(source_info["chunks_buffer"]) if source_info["chunks_buffer"] else bytes()
+        # 保留最近的chunks作为新短语的预录，只移动短语起点
+        source_info["buffer"].reset_phrase(AudioConfig.get_buffer_chunks())
         source_info.update({
             'first_spoken': time_spoken,
-            'last_sample': buffered_data,  # 使用合并后的buffer数据
             'new_phrase': False,
-            'chunks_buffer': []  # 重置chunks buffer
+            'partial_text': ''
         })
+        source_info["streamer"].reset()
         print('Reset data with buffer.....\n')
 
     def _update_all_transcripts(self, speaker_type, record, method='insert'):
@@ -238,6 +440,17 @@ class AudioTranscriber:
                     for t in self.structured_transcript["you"]]
         }
 
+    def get_partial_hypothesis(self, who_spoke="Speaker"):
+        """
+        返回当前未结束短语的识别结果及其保持不变的时长（秒），用于推测生成；
+        没有进行中的短语时返回 ("", 0.0)
+        """
+        source_info = self.audio_sources[who_spoke]
+        text = source_info["partial_text"]
+        if not text or source_info["new_phrase"]:
+            return "", 0.0
+        return text, time.monotonic() - source_info["partial_changed"]
+
     def get_lastContent(self):
         """获取Speaker最后一条记录的内容"""
         try:
@@ -251,6 +464,10 @@ class AudioTranscriber:
             return ''
 
     def clear_transcript_data(self):
+        with self._transcript_lock:
+            self._clear_transcript_data()
+
+    def _clear_transcript_data(self):
         self.transcript_data["You"].clear()
         self.transcript_data["Speaker"].clear()
         self.structured_transcript["you"].clear()
@@ -258,9 +475,10 @@ class AudioTranscriber:
         self.structured_transcript["combined"].clear()
 
         for source_name, source_info in self.audio_sources.items():
-            source_info["last_sample"] = bytes()
-            source_info["saved_sample"] = bytes()
-            source_info["chunks_buffer"].clear()  # 清除chunks buffer
+            source_info["buffer"].clear()  # 清除短语和预录
             source_info["new_phrase"] = True
             source_info["last_spoken"] = None
-            source_info["first_spoken"] = None
\ No newline at end of file
+            source_info["first_spoken"] = None
+            source_info["partial_text"] = ''
+            source_info["dirty"] = False
+            source_info["streamer"].reset()
\ No newline at end of file
@@ -1,27 +1,144 @@
 ##src/GPTResponder.py
 
 import threading
-import openai
+import difflib
 from .prompts import create_prompt, INITIAL_RESPONSE
 import time
 import sys
 from .config import SystemConfig,EnvConfig
+from .OpenAIClient import OpenAIClient, KEEPALIVE_INTERVAL
+from .ResponseManager import STATUS_ERROR, STATUS_SKIPPED
+from .ResponseParser import ResponseParser
+
+
+class GenerationJob:
+    """
+    一次回复生成任务
+
+    生成在独立线程中进行；cancel()设置取消标志并关闭HTTP流，
+    正在读取流的线程随即退出，不再为无人阅读的token付费。
+    """
+
+    def __init__(self, response_id, question_text, context_id=None, speculative=False):
+        self.response_id = response_id    # 推测任务在被采用前为None
+        self.question_text = question_text
+        self.context_id = context_id      # 作为上下文的上一个回复
+        self.speculative = speculative
+        self.cancelled = threading.Event()
+        self.thread = None
+        self.started = time.monotonic()
+        self.first_token = None  # 第一段回复文本（或完整结论）就绪的时间
+        self.finished = None
+        self.failed = False
+        self.skipped = False  # 模型给出了None结论，生成已提前结束
+        self.text = ""   # 方括号内已生成的回复
+        self.tokens = 0  # 收到的内容chunk数，约等于completion token数
+        self._stream = None
+        self._written = False  # 是否已向关联的response写入过内容
+        self._lock = threading.Lock()
+
+    def publish(self, delta, is_complete, write, replace=False):
+        """
+        追加新生成的文本（replace时替换全部内容）；已关联response时调用
+        write(response_id, text, is_complete, is_incremental)写入：
+        第一次写入替换占位内容，之后只写入delta
+        """
+        with self._lock:
+            self.text = delta if replace else self.text + delta
+            if self.first_token is None and (delta or is_complete):
+                self.first_token = time.monotonic()
+            if is_complete:
+                self.finished = time.monotonic()
+            if not self.response_id:
+                return
+            if self._written and not replace:
+                write(self.response_id, delta, is_complete, True)
+            else:
+                write(self.response_id, self.text, is_complete, False)
+                self._written = True
+
+    def adopt(self, response_id, write):
+        """推测任务被最终问题采用：关联response并写入已生成的内容，返回 (是否已生成完, 首段文本就绪时间)"""
+        with self._lock:
+            self.response_id = response_id
+            done = self.finished is not None
+            write(response_id, self.text, done)
+            self._written = True
+            return done, self.first_token
+
+    def attach(self, stream):
+        """登记正在读取的流；任务已被取消时立即关闭"""
+        with self._lock:
+            self._stream = stream
+            cancelled = self.cancelled.is_set()
+        if cancelled:
+            self._close_stream(stream)
+
+    def close(self):
+        """不再需要后续内容时关闭流（不标记为取消）"""
+        with self._lock:
+            stream = self._stream
+        if stream is not None:
+            self._close_stream(stream)
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled.set()
+            stream = self._stream
+        if stream is not None:
+            self._close_stream(stream)
+
+    def is_alive(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    @staticmethod
+    def _close_stream(stream):
+        try:
+            stream.close()
+        except Exception as e:
+            print(f"Error closing response stream: {e}")
+
 
 class GPTResponder:
-    def __init__(self, response_manager):
+    """
+    基于转录内容生成回复
+
+    使用OpenAIClient共享的连接池；启动时在后台预热连接，并在空闲时保活，
+    会话中的第一个回复不必等待TLS握手。参数来自conf.yaml的OpenAIChat部分。
+    """
+
+    def __init__(self, response_manager, model="gpt-4o-mini", temperature=0.6, timeout=30.0,
+                 max_retries=2, base_url=None, keepalive_interval=KEEPALIVE_INTERVAL):
         self.response_manager = response_manager
+        self.model = model
+        self.temperature = temperature
+        self.client = None
         self.response = ""
         self._response_update_interval = 2
         self._lock = threading.Lock()
-        self._processing = False
+        self._job = None  # 当前的生成任务
+        self._speculative_job = None  # 基于Speaker partial识别结果的推测生成任务
         self._last_processed_id = None
+        self._generation_stats = {
+            "completed": 0,
+            "completed_tokens": 0,
+            "skipped": 0,            # 因None结论提前结束的生成数
+            "skipped_tokens": 0,     # 这些生成在提前结束前实际收到的token数
+        }
+        self._speculation_stats = {
+            "started": 0,
+            "adopted": 0,
+            "discarded": 0,
+            "wasted_tokens": 0,      # 被丢弃的推测任务已收到的completion token数
+            "ttft_saved": 0.0,       # 被采用的推测任务节省的首段回复等待时间总和（秒）
+        }
         # 初始化OpenAI配置
-        if not self._initialize_openai():
+        if not self._initialize_openai(timeout, max_retries, base_url, keepalive_interval):
             raise ValueError("Failed to initialize OpenAI configuration. Please check your API key.")
 
-    def _initialize_openai(self) -> bool:
+    def _initialize_openai(self, timeout, max_retries, base_url, keepalive_interval) -> bool:
         """
-        初始化OpenAI配置
+        初始化OpenAI客户端，并在后台预热连接
         
         Returns:
             bool: 初始化成功返回True，否则返回False
@@ -29,10 +146,11 @@ class GPTResponder:
         if not EnvConfig.ensure_api_key():
             return False
             
-        openai.api_key = EnvConfig.get_openai_key()
+        self.client = OpenAIClient.get_client(base_url).with_options(timeout=timeout, max_retries=max_retries)
+        OpenAIClient.start_keepalive(base_url, keepalive_interval)
         return True
 
-    def _generate_response_from_transcript(self, lastContent, latest_response_text="", latest_response_q_text="", current_response_id=None):
+    def _generate_response_from_transcript(self, lastContent, latest_response_text="", latest_response_q_text="", current_response_id=None, job=None):
         """
         从转录内容生成流式回复
         
@@ -41,6 +159,8 @@ class GPTResponder:
             latest_response_text (str): 上一次的回复内容
             latest_response_q_text (str): 上一次的问题内容
             current_response_id (str): 当前响应的ID
+            job (GenerationJob): 所属的生成任务，被取消时停止读取流；
+                内容写入任务当前关联的response
             
         Yields:
             str: 生成的部分回复内容
@@ -49,6 +169,7 @@ class GPTResponder:
         if lastContent.strip() == "" or len(lastContent.strip()) < 4:
             print(f"Skipping due to too short content (length: {len(lastContent.strip())})")
             return
+        job = job or GenerationJob(current_response_id, lastContent)
 
         conversation_history = []
         recent_speakers = [f"Speaker: [{latest_response_q_text}]\n\n"]
@@ -68,82 +189,87 @@ class GPTResponder:
             #print(f"Created prompt: {content}")
 
             # 使用流式API
-            stream = openai.chat.completions.create(
-                model="gpt-4o-mini",
+            stream = self.client.chat.completions.create(
+                model=self.model,
                 messages=[
                     {"role": "system", "content": SystemConfig.get_system_role()},
                     {"role": "user", "content": content},
                 ],
-                temperature=0.6,
+                temperature=self.temperature,
                 stream=True  # 启用流式响应
             )
+            job.attach(stream)
 
-            accumulated_response = ""
+            # 只解析新到的chunk，方括号内新增的文本增量写入
+            parser = ResponseParser()
             for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    chunk_content = chunk.choices[0].delta.content
-                    accumulated_response += chunk_content
-                    
-                    # 尝试解析方括号中的内容
-                    try:
-                        if '[' in accumulated_response and ']' in accumulated_response:
-                            response_text = accumulated_response.split("[")[1].split("]")[0]
-                        else:
-                            response_text = accumulated_response
-                            
-                        # 更新响应
-                        if current_response_id:
-                            self.response = response_text
-                            self.response_manager.update_response(
-                                current_response_id,
-                                response_text,
-                                is_complete=False
-                            )
-                        
-                        yield response_text
-                        
-                    except Exception as e:
-                        print(f"Error parsing chunk: {e}")
-                        yield chunk_content
-
-            # 完成后标记为完整响应
-            if current_response_id:
-                try:
-                    # 尝试获取方括号中的内容，如果失败则使用完整响应
-                    if '[' in accumulated_response and ']' in accumulated_response:
-                        final_response = accumulated_response.split("[")[1].split("]")[0]
-                    else:
-                        print("No brackets found in response, using full response")
-                        final_response = accumulated_response
-                    
-                    self.response_manager.update_response(
-                        current_response_id,
-                        final_response,
-                        is_complete=True
-                    )
-                except Exception as e:
-                    print(f"Error processing final response: {e}")
-                    # 如果解析失败，使用累积的完整响应
-                    self.response_manager.update_response(
-                        current_response_id,
-                        accumulated_response,
-                        is_complete=True
-                    )
+                if job.cancelled.is_set():
+                    return
+                if chunk.choices and chunk.choices[0].delta.content:
+                    job.tokens += 1
+                    delta = parser.feed(chunk.choices[0].delta.content)
+                    if delta:
+                        self._publish(job, delta)
+                        yield job.text
+                    if parser.done:
+                        # 第一对方括号已结束（包括None结论），之后的内容不再使用，关闭流
+                        job.close()
+                        break
+
+            if job.cancelled.is_set():
+                return
+
+            # 完成后标记为完整响应；None/空的结论标记为skipped，不显示
+            if not parser.done:
+                print("No complete brackets found in response, using full response")
+            delta = parser.finish()
+            if parser.is_none:
+                job.skipped = True
+                self._publish(job, parser.text, is_complete=True, status=STATUS_SKIPPED, replace=True)
+            else:
+                self._publish(job, delta, is_complete=True)
+            self._record_generation(job)
+            yield job.text
                 
         except Exception as e:
+            if job.cancelled.is_set():
+                # 取消时关闭流导致的读取异常
+                return
             print(f"Error in generate_response: {e}")
             error_message = str(e)
-            if current_response_id:
-                self.response_manager.update_response(
-                    current_response_id,
-                    error_message,
-                    is_complete=True
-                )
+            job.failed = True
+            self._publish(job, error_message, is_complete=True, status=STATUS_ERROR, replace=True)
             yield error_message
 
+    def _record_generation(self, job):
+        with self._lock:
+            if job.skipped:
+                self._generation_stats["skipped"] += 1
+                self._generation_stats["skipped_tokens"] += job.tokens
+            else:
+                self._generation_stats["completed"] += 1
+                self._generation_stats["completed_tokens"] += job.tokens
+        if job.skipped:
+            stats = self.get_generation_stats()
+            print(f"[OpenAI] Generation skipped after {job.tokens} tokens: "
+                  f"{stats['skipped']} skipped, {stats['skipped_tokens']} tokens read before abort so far")
+
+    def _publish(self, job, delta, is_complete=False, status=None, replace=False):
+        """写入生成的内容：写入任务当前关联的response，推测任务被采用前只记录在任务中"""
+        def write(response_id, text, is_complete, is_incremental):
+            if not is_complete:
+                self.response = job.text
+            self.response_manager.update_response(response_id, text, is_complete=is_complete,
+                                                  is_incremental=is_incremental, status=status)
+
+        job.publish(delta, is_complete, write, replace)
+
     def respond_to_transcriber(self, transcriber):
         """
         持续监听并响应转录器的输出
+
+        新的Speaker问题会取消仍在生成的上一个回复（标记为superseded）并立即开始生成；
+        推测模式下，Speaker的partial识别结果稳定一段时间后就提前开始生成
         
         Args:
             transcriber: 转录器实例
@@ -160,45 +286,168 @@ class GPTResponder:
                         
                         if (current_response_id and 
                             current_response_id != self._last_processed_id and 
-                            not self._processing):
-                            
-                            with self._lock:
-                                self._processing = True
-                            
-                            try:
-                                question_text = latest_record[0]
-                                self.response = "Thinking..."
-                                self.response_manager.update_response(current_response_id, self.response)
-                                
-                                latest_response = self.response_manager.get_response(self._last_processed_id)
-                                latest_response_text = ""
-                                latest_response_q_text = ""
-                                if latest_response and latest_response.is_complete:
-                                    latest_response_text = latest_response.response_text
-                                    latest_response_q_text = latest_response.question_text
-                                
-                                response_text = ''
-                                # 使用生成器处理流式响应
-                                for response_text in self._generate_response_from_transcript(
-                                    question_text,
-                                    latest_response_text,
-                                    latest_response_q_text,
-                                    current_response_id
-                                ):
-                                    if response_text.strip():
-                                        #print(f"Generated partial response: {response_text}")
-                                        self.response = response_text
-                                
-                                print(f"Generated response: {response_text}")
-                                self._last_processed_id = current_response_id
-                                
-                            finally:
-                                with self._lock:
-                                    self._processing = False
+                            (self._job is None or current_response_id != self._job.response_id)):
+                            self._start_job(current_response_id, latest_record[0])
+                elif SystemConfig.get_speculative_mode() and not SystemConfig.get_record_only_mode():
+                    self._speculate(transcriber)
             
             except Exception as e:
                 print(f"Error in respond_to_transcriber: {e}")
                 time.sleep(0.1)
 
+    def _start_job(self, response_id, question_text):
+        """
+        为新问题开始生成：与推测任务的问题足够接近时直接采用推测任务，
+        否则取消推测任务并启动新的生成线程；仍在进行的上一个回复被取代
+        """
+        available = time.monotonic()  # 最终问题可用的时间
+        with self._lock:
+            previous = self._job
+            speculative, self._speculative_job = self._speculative_job, None
+            job = None
+            if speculative is not None:
+                if self._can_adopt(speculative, question_text):
+                    job = speculative
+                else:
+                    self._discard_speculation(speculative, "final transcript differs")
+
+            if previous is not None and previous.is_alive():
+                previous.cancel()
+                self.response_manager.mark_superseded(previous.response_id)
+                print(f"Response {previous.response_id} superseded by {response_id}")
+
+            if job is None:
+                job = GenerationJob(response_id, question_text, self._last_processed_id)
+                job.thread = threading.Thread(target=self._run_job, args=(job,), daemon=True)
+                self._job = job
+                job.thread.start()
+                return
+            self._job = job
+        self._adopt(job, response_id, available)
+
+    def _speculate(self, transcriber):
+        """Speaker的partial识别结果保持不变超过设定时间后，基于它启动推测生成"""
+        text, stable_for = transcriber.get_partial_hypothesis("Speaker")
+        if len(text.strip()) < 4 or stable_for < SystemConfig.get_speculative_delay():
+            return
+        with self._lock:
+            current = self._speculative_job
+            if current is not None:
+                if self._matches(current.question_text, text):
+                    return
+                self._discard_speculation(current, "partial transcript changed")
+
+            job = GenerationJob(None, text, self._last_processed_id, speculative=True)
+            job.thread = threading.Thread(target=self._run_job, args=(job,), daemon=True)
+            self._speculative_job = job
+            self._speculation_stats["started"] += 1
+        print(f"[Speculative] Started on partial: {text}")
+        job.thread.start()
+
+    @staticmethod
+    def _matches(speculated_text, final_text) -> bool:
+        ratio = difflib.SequenceMatcher(None, speculated_text.strip().lower(), final_text.strip().lower()).ratio()
+        return ratio >= SystemConfig.get_speculative_match_ratio()
+
+    def _can_adopt(self, job, question_text) -> bool:
+        """推测任务未失败、仍在生成或已生成完，且问题文本和上下文都与最终问题一致"""
+        return (not job.failed
+                and (job.finished is not None or job.is_alive())
+                and job.context_id == self._last_processed_id
+                and self._matches(job.question_text, question_text))
+
+    def _discard_speculation(self, job, reason):
+        """取消推测任务，计入浪费的token；调用方持有self._lock"""
+        job.cancel()
+        self._speculation_stats["discarded"] += 1
+        self._speculation_stats["wasted_tokens"] += job.tokens
+        print(f"[Speculative] Discarded ({reason}), wasted {job.tokens} tokens: {job.question_text}")
+
+    def _adopt(self, job, response_id, available):
+        """
+        把推测任务关联到最终问题的response，已生成的内容立即显示
+
+        节省的首段等待时间：不推测时首段文本在 available + TTFT 时出现（TTFT按推测任务自身的
+        first_token - started估算），推测时在 max(available, first_token) 时出现，
+        两者之差为 min(first_token, available) - started；首段尚未生成时按available计算
+        """
+        def write(response_id, text, done):
+            if job.skipped:
+                self.response_manager.update_response(response_id, text, is_complete=True, status=STATUS_SKIPPED)
+                return
+            self.response = text or "Thinking..."
+            self.response_manager.update_response(response_id, self.response, is_complete=done)
+
+        done, first_token = job.adopt(response_id, write)
+        saved = max(0.0, min(first_token or available, available) - job.started)
+        if done:
+            self._last_processed_id = response_id
+        with self._lock:
+            self._speculation_stats["adopted"] += 1
+            self._speculation_stats["ttft_saved"] += saved
+        print(f"[Speculative] Adopted for {response_id}, first token {saved:.2f}s earlier")
+
+    def _run_job(self, job):
+        """在生成线程中执行一次回复生成"""
+        try:
+            shown = self.response
+            if job.response_id:
+                self.response = "Thinking..."
+                self.response_manager.update_response(job.response_id, self.response)
+            
+            latest_response = self.response_manager.get_response(job.context_id)
+            latest_response_text = ""
+            latest_response_q_text = ""
+            if latest_response and latest_response.is_complete:
+                latest_response_text = latest_response.response_text
+                latest_response_q_text = latest_response.question_text
+            
+            response_text = ''
+            # 使用生成器处理流式响应
+            for response_text in self._generate_response_from_transcript(
+                job.question_text,
+                latest_response_text,
+                latest_response_q_text,
+                job.response_id,
+                job
+            ):
+                if response_text.strip() and not job.cancelled.is_set() and job.response_id:
+                    #print(f"Generated partial response: {response_text}")
+                    self.response = response_text
+            
+            if job.cancelled.is_set():
+                print(f"Generation cancelled: {job.response_id or job.question_text}")
+                return
+            if job.response_id is None:
+                # 推测任务尚未被采用，结果保留在任务中
+                print(f"[Speculative] Generated: {response_text}")
+                return
+            if job.skipped:
+                # 不显示None，保留之前显示的回复
+                if self._job is job:
+                    self.response = shown
+                print(f"Skipped response ({response_text or 'empty'}) after {job.tokens} tokens: {job.response_id}")
+            else:
+                print(f"Generated response: {response_text}")
+            self._last_processed_id = job.response_id
+        
+        except Exception as e:
+            print(f"Error in generation job: {e}")
+
     def update_response_interval(self, interval):
-        self._response_update_interval = interval
\ No newline at end of file
+        self._response_update_interval = interval
+
+    def get_speculation_stats(self) -> dict:
+        """推测生成的统计：浪费的token与节省的首段等待时间"""
+        with self._lock:
+            stats = dict(self._speculation_stats)
+        stats["adopt_rate"] = stats["adopted"] / stats["started"] if stats["started"] else 0.0
+        stats["avg_ttft_saved"] = stats["ttft_saved"] / stats["adopted"] if stats["adopted"] else 0.0
+        return stats
+
+    def get_generation_stats(self) -> dict:
+        """生成的统计：完整回复与因None结论提前结束的生成各自的数量和实际收到的token数"""
+        with self._lock:
+            stats = dict(self._generation_stats)
+        stats["avg_answer_tokens"] = stats["completed_tokens"] / stats["completed"] if stats["completed"] else 0.0
+        return stats
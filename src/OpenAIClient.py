@@ -0,0 +1,111 @@
+#src/OpenAIClient.py
+
+import threading
+import time
+import httpx
+import openai
+from .config import EnvConfig
+
+CONNECT_TIMEOUT = 5.0      # 建立连接（含TLS握手）的超时（秒）
+READ_TIMEOUT = 30.0        # 等待响应的默认超时（秒）
+MAX_CONNECTIONS = 8        # 连接池的最大连接数
+KEEPALIVE_CONNECTIONS = 4  # 空闲时保持的长连接数
+KEEPALIVE_EXPIRY = 120.0   # 空闲长连接的保持时间（秒）
+KEEPALIVE_INTERVAL = 60.0  # 连接空闲多久后发送一次保活请求（秒），应小于KEEPALIVE_EXPIRY
+
+
+class OpenAIClient:
+    """
+    进程内共享的OpenAI客户端
+
+    每个base_url一个客户端，所有调用复用同一个httpx连接池，只在第一次请求时进行TLS握手，
+    之后的请求走已建立的长连接。base_url可指向兼容OpenAI的服务或本地mock服务器
+    （tools/mock_openai_server.py）；为None时使用OPENAI_BASE_URL环境变量或官方地址。
+
+    start_keepalive()在启动时预热连接，并在连接空闲时发送轻量请求（GET /models），
+    使会话中的第一次请求不必等待DNS、TCP和TLS握手。
+    """
+    _clients = {}        # base_url -> openai.OpenAI
+    _last_activity = {}  # base_url -> 最近一次请求的时间（monotonic）
+    _keepalive = {}      # base_url -> 保活线程的停止事件
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_client(cls, base_url=None) -> openai.OpenAI:
+        """
+        获取base_url对应的共享客户端
+
+        各调用方用client.with_options(timeout=..., max_retries=...)调整单次请求的参数，
+        with_options返回的副本仍共享同一个连接池
+        """
+        with cls._lock:
+            client = cls._clients.get(base_url)
+            if client is None:
+                client = openai.OpenAI(
+                    api_key=EnvConfig.get_openai_key(),
+                    base_url=base_url,
+                    timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                    http_client=httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=MAX_CONNECTIONS,
+                            max_keepalive_connections=KEEPALIVE_CONNECTIONS,
+                            keepalive_expiry=KEEPALIVE_EXPIRY,
+                        ),
+                        event_hooks={"request": [lambda request, key=base_url: cls._touch(key)]},
+                    ),
+                )
+                cls._clients[base_url] = client
+                cls._last_activity[base_url] = 0.0
+            return client
+
+    @classmethod
+    def _touch(cls, base_url):
+        cls._last_activity[base_url] = time.monotonic()
+
+    @classmethod
+    def warm_up(cls, base_url=None) -> bool:
+        """发送一次轻量请求，建立的连接留在连接池中供后续请求复用"""
+        try:
+            client = cls.get_client(base_url).with_options(
+                timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT), max_retries=0)
+            client.models.list()
+            return True
+        except Exception as e:
+            print(f"[OpenAI] Connection warm-up failed: {e}")
+            return False
+
+    @classmethod
+    def start_keepalive(cls, base_url=None, interval=KEEPALIVE_INTERVAL):
+        """
+        启动后台线程：立即预热连接，之后连接空闲超过interval秒时发送一次保活请求；
+        interval <= 0 时只预热一次。同一base_url只启动一个线程
+        """
+        with cls._lock:
+            if base_url in cls._keepalive:
+                return
+            stop = threading.Event()
+            cls._keepalive[base_url] = stop
+        threading.Thread(target=cls._keepalive_loop, args=(base_url, interval, stop),
+                         name="openai-keepalive", daemon=True).start()
+
+    @classmethod
+    def _keepalive_loop(cls, base_url, interval, stop):
+        cls.warm_up(base_url)
+        if interval <= 0:
+            return
+        while not stop.is_set():
+            idle = time.monotonic() - cls._last_activity.get(base_url, 0.0)
+            if idle >= interval:
+                cls.warm_up(base_url)
+                idle = 0.0
+            stop.wait(interval - idle)
+
+    @classmethod
+    def close(cls):
+        with cls._lock:
+            for stop in cls._keepalive.values():
+                stop.set()
+            cls._keepalive.clear()
+            for client in cls._clients.values():
+                client.close()
+            cls._clients.clear()
@@ -0,0 +1,51 @@
+#src/PhraseEndpointer.py
+
+PAUSE_LIMIT = 1300      # 毫秒，语音后持续静音超过该值即结束短语（与asr_with_vad一致）
+MIN_SPEECH = 300        # 毫秒，短语至少包含这么多语音才会被结束
+
+
+class PhraseEndpointer:
+    """
+    基于VAD语音/停顿统计的短语端点检测
+
+    逐窗口累计语音和停顿时长：出现语音后，停顿达到pause_limit即判定短语结束。
+    短语长度因此跟随真实的说话停顿，而不是固定的墙钟超时。
+    """
+
+    def __init__(self, window_ms, threshold, pause_limit_ms=PAUSE_LIMIT, min_speech_ms=MIN_SPEECH):
+        """
+        Args:
+            window_ms: 每个VAD窗口的时长（毫秒）
+            threshold: 语音概率阈值
+            pause_limit_ms: 结束短语所需的停顿时长（毫秒）
+            min_speech_ms: 短语的最短语音时长（毫秒）
+        """
+        self.window_ms = window_ms
+        self.threshold = threshold
+        self.pause_limit_ms = pause_limit_ms
+        self.min_speech_ms = min_speech_ms
+        self.reset()
+
+    def reset(self):
+        self._speech_ms = 0.0
+        self._pause_ms = 0.0
+
+    @property
+    def in_phrase(self) -> bool:
+        return self._speech_ms > 0
+
+    def update(self, probabilities) -> bool:
+        """
+        输入一个chunk内各VAD窗口的语音概率，短语在该chunk内结束时返回True
+        """
+        ended = False
+        for probability in probabilities:
+            if probability > self.threshold:
+                self._speech_ms += self.window_ms
+                self._pause_ms = 0.0
+            elif self._speech_ms > 0:
+                self._pause_ms += self.window_ms
+                if self._pause_ms >= self.pause_limit_ms:
+                    ended = ended or self._speech_ms >= self.min_speech_ms
+                    self.reset()
+        return ended
@@ -0,0 +1,166 @@
+#src/PhraseStreamer.py
+
+import re
+import numpy as np
+
+# 用于比较两次假设的分词：中日韩文字按单字切分，其余按空白切分
+_TOKEN_PATTERN = re.compile(r'[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af]|[^\s\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af]+')
+
+ENERGY_FRAME_SECONDS = 0.02  # 寻找切分点时的能量帧长度
+
+
+def join_text(head, tail):
+    """拼接已提交文本和后续文本"""
+    if head and tail:
+        return f"{head} {tail}"
+    return head or tail
+
+
+class PhraseStreamer:
+    """
+    短语级流式转写（local agreement）
+
+    每次只重新识别短语中尚未提交的尾部窗口，而不是整段短语：
+    1. 相邻两次假设的最长公共前缀视为稳定文本（local agreement）。
+    2. 当尾部窗口超过 window_seconds 时，在窗口前部能量最低的位置切分音频；
+       前半段识别一次只用来确定它包含多少个词，提交的是稳定文本中对应数量的前缀，
+       已显示为稳定的文本不会在提交时改变。前半段之后不再重复识别。
+    这样每个采样最多被识别有限次，整段短语的识别开销与音频长度成线性关系。
+    """
+
+    def __init__(self, transcribe_func, sample_rate, window_seconds=8.0,
+                 min_commit_seconds=2.0, tail_seconds=2.0):
+        """
+        Args:
+            transcribe_func: 识别函数，接收int16音频帧(numpy数组)返回文本
+            sample_rate: 音频采样率
+            window_seconds: 尾部窗口的最大长度（秒）
+            min_commit_seconds: 每次提交的最短音频长度（秒）
+            tail_seconds: 切分时窗口末尾保留不提交的长度（秒）
+        """
+        self.transcribe = transcribe_func
+        self.sample_rate = sample_rate
+        self.window_seconds = window_seconds
+        self.min_commit_seconds = min_commit_seconds
+        self.tail_seconds = tail_seconds
+        self.reset()
+
+    def reset(self):
+        """开始新短语时重置状态"""
+        self._committed_frames = 0
+        self._committed_text = ""
+        self._prev_hypothesis = ""
+        self._agreed = ""  # 尾部窗口最近两次假设一致的前缀
+
+    @property
+    def committed_text(self):
+        return self._committed_text
+
+    def update(self, audio):
+        """
+        处理当前短语的全部音频，返回当前的完整假设
+
+        Args:
+            audio: 当前短语从开头到现在的音频帧，shape为(frames,)或(frames, channels)
+        """
+        window = audio[self._committed_frames:]
+        if len(window) > int(self.window_seconds * self.sample_rate):
+            cut = self._find_cut(window)
+            head_text = self.transcribe(window[:cut]).strip()
+            self._committed_text = join_text(self._committed_text, self._commit_text(head_text))
+            self._committed_frames += cut
+            self._prev_hypothesis = ""
+            self._agreed = ""
+            window = window[cut:]
+
+        hypothesis = self.transcribe(window).strip() if len(window) else ""
+        self._agreed = self._agreed_prefix(self._prev_hypothesis, hypothesis)
+        self._prev_hypothesis = hypothesis
+        return join_text(self._committed_text, hypothesis)
+
+    def _commit_text(self, head_text):
+        """
+        切分点之前的音频对应的提交文本：取稳定前缀中与head_text词数相同的部分；
+        稳定前缀不够长时（假设尚未收敛）才使用head_text
+        """
+        count = len(_TOKEN_PATTERN.findall(head_text))
+        agreed = list(_TOKEN_PATTERN.finditer(self._agreed))
+        if count and len(agreed) >= count:
+            return self._agreed[:agreed[count - 1].end()]
+        return head_text
+
+    def _find_cut(self, window):
+        """在窗口前部（保留尾部tail_seconds）找能量最低的帧作为切分点"""
+        frame_len = max(1, int(ENERGY_FRAME_SECONDS * self.sample_rate))
+        start = int(self.min_commit_seconds * self.sample_rate) // frame_len
+        end = (len(window) - int(self.tail_seconds * self.sample_rate)) // frame_len
+        if end <= start:
+            return len(window) - int(self.tail_seconds * self.sample_rate)
+
+        frames = window[start * frame_len:end * frame_len].reshape(end - start, -1)
+        energy = np.square(frames, dtype=np.float32).mean(axis=1)
+        return (start + int(np.argmin(energy))) * frame_len + frame_len // 2
+
+    @staticmethod
+    def _agreed_prefix(previous, current):
+        """返回current中与previous一致的最长前缀（按词/字比较）"""
+        if not previous or not current:
+            return ""
+        end = 0
+        for prev_token, match in zip(_TOKEN_PATTERN.findall(previous), _TOKEN_PATTERN.finditer(current)):
+            if prev_token != match.group():
+                break
+            end = match.end()
+        return current[:end]
+
+
+class BackendPhraseStreamer:
+    """
+    把ASR后端自带的流式会话（create_stream）适配为PhraseStreamer的接口
+
+    后端保留解码上下文，每次update只把短语中新增的帧送入后端，不重新识别整段短语。
+    """
+
+    def __init__(self, stream, feed_func, finalize_func=None):
+        """
+        Args:
+            stream: 后端的流式会话，提供feed/reset
+            feed_func: 送入新增int16帧并返回整段文本的函数（通常经过调度器调用stream.feed）
+            finalize_func: 短语结束时返回最终文本的函数（经过调度器调用stream.finalize），
+                后端没有finalize时为None
+        """
+        self.stream = stream
+        self.feed = feed_func
+        self.finalize_func = finalize_func
+        self._fed_frames = 0
+        self._text = ""
+
+    def reset(self):
+        """开始新短语时重置状态"""
+        self.stream.reset()
+        self._fed_frames = 0
+        self._text = ""
+
+    def finalize(self):
+        """短语结束时取回后端尚未解码的音频或异步到达的最终结果，返回整段文本"""
+        if self.finalize_func is not None:
+            self._text = self.finalize_func()
+        return self._text
+
+    def close(self):
+        """关闭后端会话（切换ASR后端时）"""
+        if hasattr(self.stream, "close"):
+            self.stream.close()
+
+    def update(self, audio_frames):
+        """
+        输入当前短语的全部音频帧，只把上次之后新增的部分交给后端
+
+        feed_func抛出异常（如任务被跳过）时不记录进度，下次连同新音频一起送入
+        """
+        if len(audio_frames) < self._fed_frames:
+            self.reset()
+        if len(audio_frames) > self._fed_frames:
+            self._text = self.feed(audio_frames[self._fed_frames:])
+            self._fed_frames = len(audio_frames)
+        return self._text
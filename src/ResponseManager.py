@@ -10,6 +10,14 @@ import traceback
 from datetime import datetime, timezone
 import pytz
 
+# Response.status 的取值
+STATUS_PENDING = "pending"         # 已创建，尚未开始生成
+STATUS_STREAMING = "streaming"     # 正在流式生成
+STATUS_COMPLETE = "complete"       # 生成完成
+STATUS_SUPERSEDED = "superseded"   # 被更新的问题取代，生成已取消
+STATUS_SKIPPED = "skipped"         # 模型判断无需回复（None），生成已提前结束
+STATUS_ERROR = "error"             # 生成失败，response_text为错误信息
+
 
 @dataclass
 class Response:
@@ -19,6 +27,7 @@ class Response:
     response_time: Optional[datetime] = None
     response_text: Optional[str] = None
     is_complete: bool = False
+    status: str = STATUS_PENDING
 
     def to_dict(self):
         """转换为可序列化的字典"""
@@ -28,7 +37,8 @@ class Response:
             'question_text': self.question_text,
             'response_time': self.response_time.isoformat() if self.response_time else None,
             'response_text': self.response_text,
-            'is_complete': self.is_complete
+            'is_complete': self.is_complete,
+            'status': self.status
         }
     
 class ResponseManager:
@@ -187,7 +197,8 @@ class ResponseManager:
                             "question_text": response.question_text,
                             "response_time": self._format_datetime(response.response_time),
                             "response_text": response.response_text,
-                            "is_complete": response.is_complete
+                            "is_complete": response.is_complete,
+                            "status": response.status
                         }
                 
                 # 创建导出数据结构
@@ -303,13 +314,16 @@ class ResponseManager:
         return response_id
 
     def update_response(self, response_id: str, response_text: str, 
-                    is_complete: bool = False, is_incremental: bool = False):
-        """更新response内容，支持增量更新"""
+                    is_complete: bool = False, is_incremental: bool = False,
+                    status: Optional[str] = None):
+        """更新response内容，支持增量更新；已被取代的response不再接受更新"""
         with self._lock:
             if response_id not in self._responses:
                 return False
             
             response = self._responses[response_id]
+            if response.status == STATUS_SUPERSEDED:
+                return False
             if response.response_time is None:
                 response.response_time = datetime.now().astimezone(self._local_tz)
             
@@ -319,11 +333,21 @@ class ResponseManager:
                 response.response_text = response_text
                 
             response.is_complete = is_complete
+            response.status = status or (STATUS_COMPLETE if is_complete else STATUS_STREAMING)
             
             if is_complete:
                 self._new_response_event.set()
             return True
             
+    def mark_superseded(self, response_id: str) -> bool:
+        """将生成被取消的response标记为已取代，保留已生成的部分内容"""
+        with self._lock:
+            response = self._responses.get(response_id)
+            if response is None or response.status in (STATUS_COMPLETE, STATUS_SKIPPED, STATUS_ERROR):
+                return False
+            response.status = STATUS_SUPERSEDED
+            return True
+
     def get_response(self, response_id: str) -> Optional[Response]:
         """获取指定response"""
         #print(f"Get Response ID: {response_id}")
@@ -0,0 +1,99 @@
+#src/ResponseParser.py
+
+# 解析器状态
+BEFORE = 0       # 等待第一个 "["
+INSIDE = 1       # 在第一对方括号内
+DONE = 2         # 已读到第一个 "]"，之后的内容不再使用
+PASSTHROUGH = 3  # 整个回复都没有方括号（finish时确定），全部内容都是回复
+
+NONE_REPLY = "none"
+
+
+class ResponseParser:
+    """
+    流式回复的增量解析器
+
+    提示词要求模型把回复放在方括号中，并在不需要回复时返回 None。
+    feed()每次只处理新到的chunk，返回第一对方括号内新增的文本（delta），
+    不再对累积的完整回复反复split。
+
+    "[" 之前的前言不输出，整个流中都继续寻找 "["，输出与chunk的切分方式无关；
+    直到finish()仍没有出现方括号时，才把全部内容作为回复。
+    方括号内的内容在还可能是 None 时暂不输出；读到 "]" 时如果内容为 None 或空，
+    is_none为True。done表示第一对方括号已结束，调用方可以停止读取流。
+    """
+
+    def __init__(self):
+        self.state = BEFORE
+        self.text = ""          # 已输出的回复文本
+        self.is_none = False    # 模型给出了 None/空 的结论
+        self._prefix = ""       # "[" 之前的内容
+        self._held = ""         # 方括号内暂不输出的内容（可能是None）
+        self._holding = True
+
+    @property
+    def done(self) -> bool:
+        return self.state == DONE
+
+    def feed(self, chunk: str) -> str:
+        """处理一个chunk，返回新增的回复文本"""
+        if self.state == BEFORE:
+            start = chunk.find("[")
+            if start < 0:
+                self._prefix += chunk
+                return ""
+            self.state = INSIDE
+            self._prefix = ""
+            chunk = chunk[start + 1:]
+
+        if self.state == INSIDE:
+            end = chunk.find("]")
+            if end < 0:
+                return self._inside(chunk)
+            self.state = DONE
+            delta = self._inside(chunk[:end])
+            if self._holding:
+                if _is_none(self._held):
+                    self.is_none = True
+                    return delta
+                delta += self._release()
+            return delta
+        return ""
+
+    def finish(self) -> str:
+        """流结束时调用，返回尚未输出的回复文本（None的结论也一并输出）"""
+        if self.state == BEFORE:
+            # 整个回复都没有方括号，全部内容作为回复
+            self.state = PASSTHROUGH
+            self.is_none = _is_none(self._prefix)
+            chunk, self._prefix = self._prefix, ""
+            return self._emit(chunk)
+        if self._holding and self.state != PASSTHROUGH:
+            self.is_none = self.is_none or _is_none(self._held)
+            return self._release()
+        return ""
+
+    def _inside(self, chunk: str) -> str:
+        if not self._holding:
+            return self._emit(chunk)
+        self._held += chunk
+        if NONE_REPLY.startswith(_normalize(self._held)):
+            return ""
+        return self._release()
+
+    def _release(self) -> str:
+        self._holding = False
+        chunk, self._held = self._held, ""
+        return self._emit(chunk)
+
+    def _emit(self, chunk: str) -> str:
+        self.text += chunk
+        return chunk
+
+
+def _normalize(text: str) -> str:
+    return text.strip().strip("'\"`.").lower()
+
+
+def _is_none(text: str) -> bool:
+    return _normalize(text) in (NONE_REPLY, "")
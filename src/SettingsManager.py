@@ -17,7 +17,16 @@ class SettingsManager:
         "knowledge": "none",
         "window_opacity": 1.0,
         "window_topmost": False,
-        "record_only_mode": False  # 添加新设置项
+        "record_only_mode": False,  # 添加新设置项
+        "asr_model": "",            # 空字符串表示使用conf.yaml的ASR_MODEL
+        "streaming_mode": True,     # 流式转写：只重新识别短语的尾部窗口
+        "stream_window": 8.0,
+        "vad_gate": True,           # 采集时用Silero VAD过滤非语音chunk
+        "endpoint_mode": "vad",     # vad（停顿检测）/ timeout（墙钟超时）
+        "audio_queue_size": 16,
+        "audio_queue_policy": "merge",  # merge / drop_oldest / drop_newest
+        "speculative_mode": False,  # 推测生成：partial结果稳定后提前生成回复
+        "speculative_delay": 0.8
     }
     
     def __init__(self):
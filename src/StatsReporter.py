@@ -0,0 +1,56 @@
+#src/StatsReporter.py
+
+import threading
+
+REPORT_INTERVAL = 60.0  # 定期输出统计的间隔（秒）
+
+
+class StatsReporter:
+    """
+    定期把各组件get_stats()返回的统计输出到日志
+
+    只输出与上次相比有变化的统计，空闲时不重复输出；stop()时输出一次完整统计。
+    """
+
+    def __init__(self, interval=REPORT_INTERVAL):
+        self.interval = interval
+        self._sources = {}  # 名称 -> 返回统计dict的函数
+        self._last = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, name, get_stats):
+        with self._lock:
+            self._sources[name] = get_stats
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="stats-reporter", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.report(force=True)
+
+    def report(self, force=False):
+        with self._lock:
+            sources = list(self._sources.items())
+        for name, get_stats in sources:
+            try:
+                stats = get_stats()
+            except Exception as e:
+                print(f"[Stats] {name}: {e}")
+                continue
+            if not force and stats == self._last.get(name):
+                continue
+            self._last[name] = stats
+            print(f"[Stats] {name}: " + ", ".join(f"{key}={_format(value)}" for key, value in stats.items()))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.report()
+
+
+def _format(value):
+    return f"{value:.3f}" if isinstance(value, float) else str(value)
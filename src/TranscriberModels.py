@@ -3,95 +3,417 @@
 import openai
 import yaml
 #import whisper
-#from faster_whisper import WhisperModel
 import os
-import torch
-from src.asr.asr_factory import ASRFactory
-from src.asr.asr_interface import ASRInterface
+import io
+import wave
+import json
+import queue
+import random
+import threading
+import time
+import numpy as np
+from src.asr.model_registry import registry
 from .config import PathConfig
+from .OpenAIClient import OpenAIClient
+from .TranscriptionCache import TranscriptionCache
 
 
-def get_model(use_api):
+AUTOTUNE_FILE = "conf.autotune.yaml"
+
+
+def load_config():
+    with open(f"{PathConfig.get_project_root()}/conf.yaml", "rb") as f:
+        config = yaml.safe_load(f)
+
+    # ASRAutotune在本机测得的线程数/实例数覆盖conf.yaml中对应后端的设置
+    tuned_path = os.path.join(PathConfig.get_project_root(), AUTOTUNE_FILE)
+    if os.path.exists(tuned_path):
+        with open(tuned_path, "rb") as f:
+            tuned = yaml.safe_load(f) or {}
+        backend = tuned.get("backend")
+        if backend and isinstance(tuned.get(backend), dict):
+            config[backend] = dict(config.get(backend) or {}, **tuned[backend])
+        if backend == config.get("ASR_MODEL") and "ASR_WORKERS" in tuned:
+            config["ASR_WORKERS"] = tuned["ASR_WORKERS"]
+    return config
+
+
+def get_model(use_api, asr_model=None):
+    """
+    Args:
+        asr_model: 覆盖conf.yaml的ASR_MODEL（设置中保存的上次选择的后端）
+    """
+    config = load_config()
+    if asr_model:
+        config["ASR_MODEL"] = asr_model
+    registry.max_resident = config.get("ASR_MAX_RESIDENT_MODELS", registry.max_resident)
     if use_api:
-        return APIWhisperTranscriber()
+        # API转写是IO密集型且无状态，多个线程共享一个实例即可
+        model = APIWhisperTranscriber(**config.get("OpenAIWhisper", {}))
     else:
-        return FunASRTranscriber()
-        #return WhisperTranscriber()
+        model = TranscriberPool(lambda replica: LocalASRTranscriber(replica, config.get("ASR_MODEL")),
+                                config.get("ASR_WORKERS", 1))
 
-class FunASRTranscriber:
-    def __init__(self):
-        #self.audio_model = whisper.load_model(os.path.join(os.getcwd(), 'small.pt'))
-        with open(f"{PathConfig.get_project_root()}/conf.yaml", "rb") as f:
-            self.config = yaml.safe_load(f)
+    fast_model = config.get("CASCADE_FAST_MODEL")
+    if fast_model:
+        overrides = config.get("CASCADE_FAST_CONFIG") or {}
+        fast = TranscriberPool(lambda replica: LocalASRTranscriber(replica, fast_model, overrides),
+                               config.get("ASR_WORKERS", 1))
+        model = CascadeTranscriber(fast, model)
 
-        asr_model = "FunASR"
-        asr_config = self.config.get(asr_model, {})
+    cache_size = config.get("ASR_CACHE_SIZE", 256)
+    if cache_size:
+        model = CachedTranscriber(model, _model_cache_key(config, use_api), cache_size)
+    return model
 
-        self.audio_model = ASRFactory.get_asr_system(asr_model, **asr_config)
 
-        print(f"[INFO] FunASR using GPU: " + str(torch.cuda.is_available()))
+def _model_cache_key(config, use_api):
+    """决定识别结果的所有配置：后端、其配置以及级联快速模型"""
+    asr_model = "OpenAIWhisper" if use_api else config.get("ASR_MODEL", "FunASR")
+    fast_model = config.get("CASCADE_FAST_MODEL")
+    return json.dumps({
+        "model": asr_model,
+        "config": config.get(asr_model),
+        "fast_model": fast_model,
+        "fast_config": dict(config.get(fast_model) or {}, **(config.get("CASCADE_FAST_CONFIG") or {})) if fast_model else None,
+    }, sort_keys=True, default=str)
 
-    def init_asr(self) -> ASRInterface:
-        asr_model = self.config.get("ASR_MODEL")
-        asr_config = self.config.get(asr_model, {})
 
-        asr = ASRFactory.get_asr_system(asr_model, **asr_config)
-        return asr
+class CachedTranscriber:
+    """
+    在转写模型前加一层按音频内容哈希的LRU缓存
+
+    相同的PCM在相同模型配置下不会被识别第二次（预录chunks、合并/重试的任务等）。
+    空结果可能来自识别失败，不缓存。流式会话不经过缓存。
+    """
+
+    def __init__(self, model, model_key, maxsize=256):
+        self.model = model
+        self.model_key = model_key
+        self.cache = TranscriptionCache(maxsize)
+        self.size = getattr(model, "size", 1)
+        if hasattr(model, "transcribe_final"):
+            self.transcribe_final = self._transcribe_final
+
+    def _cached(self, kind, audio, transcribe):
+        key = TranscriptionCache.make_key(f"{self.model_key}|{kind}", audio)
+        text = self.cache.get(key)
+        if text is None:
+            text = transcribe()
+            if text:
+                self.cache.put(key, text)
+        return text
 
     def get_transcription(self, wav_file_path):
         try:
-            #with open(wav_file_path, "rb") as audio_file:
-            #    self.received_data_buffer = np.array([])
-            result = self.audio_model.transcribe_wav(wav_file_path)
-            #result = self.audio_model.transcribe(wav_file_path, fp16=torch.cuda.is_available())
+            with open(wav_file_path, "rb") as audio_file:
+                data = audio_file.read()
         except Exception as e:
             print(e)
             return ''
-        return result
+        return self._cached("wav", data, lambda: self.model.get_transcription(wav_file_path))
+
+    def transcribe_np(self, audio: np.ndarray):
+        return self._cached("np", audio, lambda: self.model.transcribe_np(audio))
+
+    def transcribe_batch(self, audios: list):
+        """只把未命中的片段交给模型批量识别"""
+        keys = [TranscriptionCache.make_key(f"{self.model_key}|np", audio) for audio in audios]
+        texts = [self.cache.get(key) for key in keys]
+        misses = [i for i, text in enumerate(texts) if text is None]
+        if misses:
+            results = self.model.transcribe_batch([audios[i] for i in misses])
+            for i, text in zip(misses, results):
+                texts[i] = text
+                if text:
+                    self.cache.put(keys[i], text)
+        return texts
+
+    def _transcribe_final(self, audio: np.ndarray):
+        return self._cached("final", audio, lambda: self.model.transcribe_final(audio))
+
+    @property
+    def supports_batch(self):
+        return getattr(self.model, "supports_batch", False)
+
+    @property
+    def supports_streaming(self):
+        return getattr(self.model, "supports_streaming", False)
+
+    def create_stream(self, on_segment=None):
+        return self.model.create_stream(on_segment)
+
+    def switch_model(self, asr_model):
+        """切换后端后缓存键随之改变，旧后端的结果不会被新后端命中"""
+        self.model.switch_model(asr_model)
+        self.model_key = _model_cache_key(dict(load_config(), ASR_MODEL=asr_model), False)
+
+    def get_stats(self) -> dict:
+        return self.cache.get_stats()
+
+
+class CascadeTranscriber:
+    """
+    两级级联转写：快速模型负责实时partial，准确模型每个完整短语只运行一次
+
+    除transcribe_final外的接口都转给快速模型，AudioTranscriber的流式/批量逻辑不变；
+    短语结束时AudioTranscriber用transcribe_final重新识别整段短语，
+    结果写入structured_transcript并发送给GPTResponder。
+    """
+
+    def __init__(self, fast, accurate):
+        self.fast = fast
+        self.accurate = accurate
+        self.size = max(getattr(fast, "size", 1), getattr(accurate, "size", 1))
+
+    def get_transcription(self, wav_file_path):
+        return self.fast.get_transcription(wav_file_path)
+
+    def transcribe_np(self, audio: np.ndarray):
+        return self.fast.transcribe_np(audio)
+
+    def transcribe_batch(self, audios: list):
+        return self.fast.transcribe_batch(audios)
+
+    @property
+    def supports_batch(self):
+        return getattr(self.fast, "supports_batch", False)
+
+    @property
+    def supports_streaming(self):
+        return getattr(self.fast, "supports_streaming", False)
+
+    def create_stream(self, on_segment=None):
+        return self.fast.create_stream(on_segment)
+
+    def transcribe_final(self, audio: np.ndarray):
+        """用准确模型识别完整短语"""
+        return self.accurate.transcribe_np(audio)
+
+    def switch_model(self, asr_model):
+        """切换准确模型（ASR_MODEL），快速模型保持不变"""
+        self.accurate.switch_model(asr_model)
+
+
+class TranscriberPool:
+    """
+    线程安全的转写推理池
+
+    持有size个模型实例，每次调用借出一个空闲实例，用完归还。
+    size为1时等同于多个转写线程共享一个加锁的模型；
+    size大于1时各音频源可以在不同CPU核心上并行转写。
+    factory(replica)按副本序号创建实例，同一副本的模型权重由注册表共享。
+    """
+
+    def __init__(self, factory, size=1):
+        self.size = max(1, int(size))
+        self._instances = queue.Queue()
+        self._all = [factory(replica) for replica in range(self.size)]
+        for instance in self._all:
+            self._instances.put(instance)
+
+    def _run(self, method, *args):
+        model = self._instances.get()
+        try:
+            return getattr(model, method)(*args)
+        finally:
+            self._instances.put(model)
 
+    def get_transcription(self, wav_file_path):
+        return self._run("get_transcription", wav_file_path)
+
+    def transcribe_np(self, audio: np.ndarray):
+        return self._run("transcribe_np", audio)
+
+    def transcribe_batch(self, audios: list):
+        return self._run("transcribe_batch", audios)
 
-class WhisperTranscriber:
+    @property
+    def supports_batch(self):
+        return self._all[0].supports_batch
 
+    @property
+    def supports_streaming(self):
+        return self._all[0].supports_streaming
+
+    def create_stream(self, on_segment=None):
+        """流式会话长期存在，按轮转分配到各实例上，解码时由后端自己加锁"""
+        self._next_stream = getattr(self, "_next_stream", -1) + 1
+        return self._all[self._next_stream % self.size].create_stream(on_segment)
+
+    def switch_model(self, asr_model):
+        """切换所有实例的ASR后端；切换期间等待实例空闲"""
+        borrowed = [self._instances.get() for _ in range(self.size)]
+        try:
+            for instance in borrowed:
+                instance.switch_model(asr_model)
+        finally:
+            for instance in borrowed:
+                self._instances.put(instance)
 
-    # Run on GPU with FP16
-    #model = WhisperModel(model_size, device="cuda", compute_type="float16")
 
-    # or run on GPU with INT8
-    # model = WhisperModel(model_size, device="cuda", compute_type="int8_float16")
-    # or run on CPU with INT8
+class LocalASRTranscriber:
+    """
+    本地ASR转写器，后端由conf.yaml的ASR_MODEL决定
 
-    def __init__(self):
+    模型通过注册表获取：相同后端和配置的模型只加载一次，切换回之前用过的后端不会重新加载权重。
+    """
+
+    def __init__(self, replica=0, asr_model=None, config_overrides=None):
+        """
+        Args:
+            config_overrides: 覆盖conf.yaml中该后端的部分配置（如级联快速模型改用greedy/tiny）
+        """
         #self.audio_model = whisper.load_model(os.path.join(os.getcwd(), 'small.pt'))
+        self.config = load_config()
+        self.config_overrides = config_overrides or {}
+        self.replica = replica
+        self.audio_model = None
+        self.switch_model(asr_model or self.config.get("ASR_MODEL", "FunASR"))
 
-        #model_size = "large-v3-turbo"
-        #model_size = "distil-small.en"
-        model_size = "small.en"
-        self.audio_model = WhisperModel(model_size, device="cpu",cpu_threads=8, compute_type="int8")
+        print(f"[INFO] {self.asr_model} using device: " + str(self.config.get(self.asr_model, {}).get("device", "cpu")))
 
-        print(f"[INFO] Whisper using GPU: " + str(torch.cuda.is_available()))
+    def switch_model(self, asr_model):
+        """切换ASR后端，旧模型交还注册表（保留在内存中直到被LRU淘汰）"""
+        asr_config = dict(self.config.get(asr_model) or {}, **self.config_overrides)
+        handle = registry.acquire(asr_model, asr_config, self.replica)
+        if self.audio_model is not None:
+            self.audio_model.release()
+        self.asr_model = asr_model
+        self.audio_model = handle
 
     def get_transcription(self, wav_file_path):
         try:
+            #with open(wav_file_path, "rb") as audio_file:
+            #    self.received_data_buffer = np.array([])
+            result = self.audio_model.transcribe_wav(wav_file_path)
             #result = self.audio_model.transcribe(wav_file_path, fp16=torch.cuda.is_available())
-            segments, _ = self.audio_model.transcribe(wav_file_path, vad_filter=True,language="en",beam_size=5)
-            result = list(segments)
         except Exception as e:
             print(e)
             return ''
-        #return result['text'].strip()
-        full_text = ""
-        for segment in result:
-        #print("[%.2fs -> %.2fs] %s" % (segment.start, segment.end, segment.text))
-            full_text += segment.text + " "  # 添加空格分隔不同段落
-        return full_text.strip()
-
-    
+        return result
+
+    def transcribe_np(self, audio: np.ndarray):
+        try:
+            result = self.audio_model.transcribe_np(audio)
+        except Exception as e:
+            print(e)
+            return ''
+        return result
+
+    @property
+    def supports_batch(self):
+        return hasattr(self.audio_model, "transcribe_batch")
+
+    @property
+    def supports_streaming(self):
+        return self.audio_model.supports_streaming
+
+    def create_stream(self, on_segment=None):
+        return self.audio_model.create_stream(on_segment)
+
+    def transcribe_batch(self, audios: list):
+        """多段音频一次推理，返回与输入顺序一致的文本列表"""
+        if not self.supports_batch:
+            return [self.transcribe_np(audio) for audio in audios]
+        try:
+            return self.audio_model.transcribe_batch(audios)
+        except Exception as e:
+            print(e)
+            return [''] * len(audios)
+
+
 class APIWhisperTranscriber:
+    """
+    OpenAI Whisper API转写
+
+    - 共享OpenAIClient的连接池，请求复用长连接，不再每次TLS握手。
+    - 音频在内存中编码（默认FLAC，约为WAV的一半大小）后上传，不经过磁盘。
+    - 同时进行的请求数不超过max_in_flight；size供调度器设置并发数。
+    - 连接错误、超时、限流和5xx按指数退避加随机抖动（full jitter）重试。
+    """
+    SAMPLE_RATE = 16000
+    UPLOAD_FORMATS = {
+        "wav": ("audio.wav", "audio/wav", "WAV", "PCM_16"),
+        "flac": ("audio.flac", "audio/flac", "FLAC", "PCM_16"),
+        "ogg": ("audio.ogg", "audio/ogg", "OGG", "OPUS"),
+    }
+    RETRYABLE_ERRORS = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+    def __init__(self, model="whisper-1", upload_format="flac", max_in_flight=4,
+                 timeout=30.0, max_retries=3, retry_backoff=0.5, base_url=None, language=None):
+        if upload_format not in self.UPLOAD_FORMATS:
+            raise ValueError(f"Unknown upload format: {upload_format}")
+        self.model = model
+        self.upload_format = upload_format
+        self.language = language
+        self.max_retries = max(0, int(max_retries))
+        self.retry_backoff = retry_backoff
+        self.size = max(1, int(max_in_flight))
+        self._in_flight = threading.BoundedSemaphore(self.size)
+        # 重试由这里控制（带抖动），关闭SDK自带的重试
+        self.client = OpenAIClient.get_client(base_url).with_options(timeout=timeout, max_retries=0)
+
     def get_transcription(self, wav_file_path):
         try:
             with open(wav_file_path, "rb") as audio_file:
-                result = openai.Audio.transcribe("whisper-1", audio_file)
+                upload = ("audio.wav", audio_file.read(), "audio/wav")
         except Exception as e:
             print(e)
             return ''
-        return result['text'].strip()
\ No newline at end of file
+        return self._transcribe(upload)
+
+    def transcribe_np(self, audio: np.ndarray):
+        """在内存中编码后上传，不经过磁盘"""
+        try:
+            upload = self._encode(audio)
+        except Exception as e:
+            print(e)
+            return ''
+        return self._transcribe(upload)
+
+    def _encode(self, audio: np.ndarray):
+        """把float32音频编码为上传格式，返回(文件名, 字节, MIME类型)"""
+        samples = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+        if self.upload_format != "wav":
+            try:
+                import soundfile as sf
+                name, mime, container, subtype = self.UPLOAD_FORMATS[self.upload_format]
+                audio_file = io.BytesIO()
+                sf.write(audio_file, samples, self.SAMPLE_RATE, format=container, subtype=subtype)
+                return name, audio_file.getvalue(), mime
+            except Exception as e:
+                # soundfile/libsndfile不可用或不支持该格式时退回WAV
+                print(f"[API ASR] {self.upload_format} encoding unavailable ({e}), uploading WAV")
+                self.upload_format = "wav"
+
+        audio_file = io.BytesIO()
+        with wave.open(audio_file, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(self.SAMPLE_RATE)
+            wf.writeframes(samples.tobytes())
+        return "audio.wav", audio_file.getvalue(), "audio/wav"
+
+    def _transcribe(self, upload):
+        params = {"model": self.model, "file": upload}
+        if self.language:
+            params["language"] = self.language
+        try:
+            result = self._with_retries(lambda: self.client.audio.transcriptions.create(**params))
+        except Exception as e:
+            print(e)
+            return ''
+        return result.text.strip()
+
+    def _with_retries(self, request):
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self._in_flight:
+                    return request()
+            except self.RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = random.uniform(0, self.retry_backoff * 2 ** attempt)
+                print(f"[API ASR] {type(e).__name__}, retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                time.sleep(delay)
@@ -3,6 +3,7 @@
 import customtkinter as ctk
 from typing import Optional, Dict, List, Any
 import traceback
+from .ResponseManager import STATUS_SKIPPED
 
 class TranscriptUI:
     """处理对话记录的UI显示和交互"""
@@ -179,7 +180,8 @@ class TranscriptUI:
                             if record['type'] == 'Speaker':
                                 self.latest_speaker_response = record['response_id']
                                 response = self.response_manager.get_response(record['response_id'])
-                                if response and response.response_text and not self.is_response_locked:
+                                if (response and response.response_text and not self.is_response_locked
+                                        and response.status != STATUS_SKIPPED):
                                     self._update_response_text(response.response_text,response.question_text)
                         # 重复插入，用于增量更新记录
                         insert_position = "1.0"
@@ -310,7 +312,7 @@ class TranscriptUI:
             if latest_speaker_record and not self.is_response_locked:
                 self.latest_speaker_response = latest_speaker_record['response_id']
                 response = self.response_manager.get_response(latest_speaker_record['response_id'])
-                if response and response.response_text:
+                if response and response.response_text and response.status != STATUS_SKIPPED:
                     self.update_latest_response(latest_speaker_record['response_id'], response.response_text)
                     
             self.text_widget.configure(state="normal")
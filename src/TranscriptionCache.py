@@ -0,0 +1,59 @@
+#src/TranscriptionCache.py
+
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+class TranscriptionCache:
+    """
+    以音频内容哈希为键的ASR结果LRU缓存
+
+    键为 blake2b(模型配置 + 调用类型 + PCM字节)，相同的音频在同一模型配置下只识别一次：
+    预录chunks重新进入下一个短语、合并或重试的任务重复提交相同缓冲区时直接命中。
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = max(1, int(maxsize))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def make_key(namespace: str, audio) -> bytes:
+        """audio为numpy数组或字节；namespace区分模型配置和调用类型"""
+        digest = hashlib.blake2b(namespace.encode("utf-8"), digest_size=16)
+        if isinstance(audio, np.ndarray):
+            digest.update(str(audio.dtype).encode("ascii"))
+            audio = np.ascontiguousarray(audio)
+        digest.update(memoryview(audio).cast("B"))
+        return digest.digest()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._entries[key]
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key, text):
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,88 @@
+#src/VoiceActivityGate.py
+
+import os
+import numpy as np
+from .asr.vad import VAD
+from .PhraseEndpointer import PhraseEndpointer
+
+VAD_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "asr", "models", "silero_vad.onnx")
+VAD_WINDOW = None         # Silero VAD窗口长度（采样点），None使用模型的默认值（v4为1536，v5为512）
+VAD_THRESHOLD = 0.5       # 任一窗口的语音概率超过该值即视为语音chunk
+HANGOVER_CHUNKS = 1       # 语音结束后继续放行的chunk数，保留句尾
+REPORT_INTERVAL = 60.0    # 每处理这么多秒音频输出一次跳过比例
+
+
+class VoiceActivityGate:
+    """
+    用Silero VAD决定采集到的chunk是否进入音频队列
+
+    静音、噪声和回环底噪不再进入队列，也就不会产生ASR调用。
+    输入为16kHz单声道int16（即重采样后的采集数据）。
+    """
+
+    def __init__(self, source_name, sample_rate=16000, threshold=VAD_THRESHOLD,
+                 hangover_chunks=HANGOVER_CHUNKS, endpointing=False):
+        """
+        Args:
+            endpointing: 是否同时根据VAD停顿检测短语结束（见PhraseEndpointer）
+        """
+        self.source_name = source_name
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.hangover_chunks = hangover_chunks
+        # ONNX会话在各音频源之间共享，每个门控只保存自己的VAD状态
+        self.vad = VAD(model_path=VAD_MODEL_PATH, window_size_samples=VAD_WINDOW)
+        self._hangover = 0
+        self._total_samples = 0
+        self._skipped_samples = 0
+        self._next_report = REPORT_INTERVAL * sample_rate
+        window_ms = self.vad.window_size_samples * 1000 / sample_rate
+        self.endpointer = PhraseEndpointer(window_ms, threshold) if endpointing else None
+
+    def speech_probabilities(self, samples: np.ndarray) -> np.ndarray:
+        """返回chunk中每个VAD窗口的语音概率；不足一个窗口的尾部留到下一个chunk"""
+        return self.vad.process_windows(np.multiply(samples, 1.0 / 32768.0, dtype=np.float32))
+
+    def process(self, samples: np.ndarray):
+        """
+        处理一个chunk
+
+        Returns:
+            (accepted, phrase_ended): chunk是否放行，以及短语是否在该chunk内结束
+        """
+        probabilities = self.speech_probabilities(samples)
+        accepted = self._accept(samples, probabilities)
+        phrase_ended = self.endpointer.update(probabilities) if self.endpointer else False
+        return accepted, phrase_ended
+
+    def _accept(self, samples, probabilities) -> bool:
+        """判断chunk是否含有语音，同时更新跳过统计"""
+        if len(probabilities) and probabilities.max() > self.threshold:
+            self._hangover = self.hangover_chunks
+            accepted = True
+        elif self._hangover > 0:
+            self._hangover -= 1
+            accepted = True
+        else:
+            accepted = False
+
+        self._total_samples += len(samples)
+        if not accepted:
+            self._skipped_samples += len(samples)
+        if self._total_samples >= self._next_report:
+            self._next_report += REPORT_INTERVAL * self.sample_rate
+            print(f"[VAD] {self.source_name}: skipped {self.skipped_ratio:.1%} of "
+                  f"{self._total_samples / self.sample_rate:.0f}s audio")
+        return accepted
+
+    @property
+    def skipped_ratio(self) -> float:
+        """被跳过的音频占比"""
+        return self._skipped_samples / self._total_samples if self._total_samples else 0.0
+
+    def get_stats(self) -> dict:
+        return {
+            "total_seconds": self._total_samples / self.sample_rate,
+            "skipped_seconds": self._skipped_samples / self.sample_rate,
+            "skipped_ratio": self.skipped_ratio,
+        }
@@ -3,16 +3,13 @@ from .asr_interface import ASRInterface
 
 
 class ASRFactory:
+    SYSTEMS = ("FunASR", "Faster-Whisper", "WhisperCPP", "Whisper", "SenseVoiceONNX", "AzureASR")
+
     @staticmethod
     def get_asr_system(system_name: str, **kwargs) -> Type[ASRInterface]:
         if system_name == "Faster-Whisper":
             from .faster_whisper_asr import VoiceRecognition as FasterWhisperASR
-            return FasterWhisperASR(
-                model_path=kwargs.get("model_path"),
-                download_root=kwargs.get("download_root"),
-                language=kwargs.get("language"),
-                device=kwargs.get("device"),
-            )
+            return FasterWhisperASR(**kwargs)
         elif system_name == "WhisperCPP":
             from .whisper_cpp_asr import VoiceRecognition as WhisperCPPASR
             return WhisperCPPASR(**kwargs)
@@ -32,12 +29,16 @@ class ASRFactory:
                 use_itn=kwargs.get("use_itn"),
                 # sample_rate=kwargs.get("sample_rate"),
             )
+        elif system_name == "SenseVoiceONNX":
+            from .sensevoice_onnx_asr import VoiceRecognition as SenseVoiceONNX
+            return SenseVoiceONNX(**kwargs)
         elif system_name == "AzureASR":
             from .azure_asr import VoiceRecognition as AzureASR
             return AzureASR(
                 subscription_key=kwargs.get("subscription_key"),
                 region=kwargs.get("region"),
-                callback=kwargs.get("callback"),
+                callback=kwargs.get("callback", print),
+                language=kwargs.get("language"),
             )
         else:
             raise ValueError(f"Unknown ASR system: {system_name}")
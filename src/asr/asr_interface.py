@@ -2,6 +2,21 @@ import abc
 import numpy as np
 
 class ASRInterface(metaclass=abc.ABCMeta):
+
+    # Backends that keep decoding state across calls set this and implement create_stream.
+    supports_streaming = False
+
+    def create_stream(self, on_segment=None):
+        """Open an incremental transcription session.
+
+        The returned object has feed(audio) -> str, which takes only the new float32
+        16kHz samples since the last call and returns the text of the whole session
+        so far, and reset(), which starts a new session. Backends that decode or
+        receive results asynchronously also provide finalize() -> str, which returns
+        the final session text at the end of a phrase. on_segment(text) is called
+        with the session text so far whenever a new segment is decoded.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support streaming")
     
     @abc.abstractmethod
     def transcribe_with_local_vad(self) -> str:
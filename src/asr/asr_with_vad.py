@@ -112,7 +112,8 @@ class VoiceRecognitionVAD:
         """
         Loads the Voice Activity Detection (VAD) model.
         """
-        self.vad_model = vad.VAD(model_path=VAD_MODEL_PATH)
+        # 512-sample windows so every 50ms block yields at least one probability
+        self.vad_model = vad.VAD(model_path=VAD_MODEL_PATH, window_size_samples=512)
         
 
     def audio_callback(self, indata, frames, time, status):
@@ -121,8 +122,8 @@ class VoiceRecognitionVAD:
         """
         data = indata.copy()
         data = data.squeeze()  # Reduce to single channel if necessary
-        vad_confidence = self.vad_model.process_chunk(data) > VAD_THRESHOLD
-        self.sample_queue.put((data, vad_confidence))
+        # VAD runs on the listening thread, keeping the real-time audio callback minimal
+        self.sample_queue.put(data)
 
     def start(self):
         """
@@ -153,7 +154,9 @@ class VoiceRecognitionVAD:
         """
         logger.info("Listening...")
         while True:  # Loop forever, but is 'paused' when new samples are not available
-            sample, vad_confidence = self.sample_queue.get()
+            sample = self.sample_queue.get()
+            probabilities = self.vad_model.process_windows(sample)
+            vad_confidence = bool(len(probabilities)) and probabilities.max() > VAD_THRESHOLD
             result = self._handle_audio_sample(sample, vad_confidence)
 
             if result:
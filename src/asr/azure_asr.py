@@ -3,18 +3,28 @@ from .asr_interface import ASRInterface
 from typing import Callable
 from halo import Halo
 import os
+import threading
 from rich import print
 import numpy as np
 
 CACHE_DIR = os.path.join(os.path.dirname(__file__), "cache")
+SAMPLE_RATE = 16000
+FLUSH_SILENCE_SECONDS = 0.8  # longer than Azure's default segmentation silence (500ms)
+FINALIZE_TIMEOUT = 1.5  # seconds finalize() waits for the final result of the last utterance
 
 class VoiceRecognition(ASRInterface):
-    def __init__(self,subscription_key=os.getenv("AZURE_API_Key"), region=os.getenv("AZURE_REGION"), callback: Callable = print ):
+
+    supports_streaming = True
+
+    def __init__(self,subscription_key=None, region=None, callback: Callable = print, language=None):
         
-        self.subscription_key = subscription_key
-        self.region = region
+        self.subscription_key = subscription_key or os.getenv("AZURE_API_Key")
+        self.region = region or os.getenv("AZURE_REGION")
 
         self.speech_config = speechsdk.SpeechConfig(subscription=self.subscription_key, region=self.region)
+        if language:
+            self.speech_config.speech_recognition_language = language
+        self.stream_format = speechsdk.audio.AudioStreamFormat(samples_per_second=SAMPLE_RATE, bits_per_sample=16, channels=1)
 
         if not self.subscription_key or not self.region:
             print("Please provide a valid subscription key and region for Azure Speech Recognition or use faster-whisper local speech recognition by changing the STT model option in the conf.yaml.", style="bold red")
@@ -56,20 +66,152 @@ class VoiceRecognition(ASRInterface):
     def transcribe_np(self, audio: np.ndarray) -> str:
         """Transcribe audio using the given parameters.
 
+        The samples are pushed to the recognizer from memory; no file is written.
+
         Args:
             audio: The numpy array of the audio data to transcribe.
         """
-        temp_file = "temp.wav"
+        push_stream = speechsdk.audio.PushAudioInputStream(stream_format=self.stream_format)
+        push_stream.write(_to_pcm16(audio))
+        push_stream.close()
+        audio_config = speechsdk.audio.AudioConfig(stream=push_stream)
+        speech_recognizer = speechsdk.SpeechRecognizer(speech_config=self.speech_config, audio_config=audio_config)
+        return self._result_text(speech_recognizer.recognize_once())
 
-        np.savetxt(temp_file, audio)
+    def transcribe_wav(self, audio) -> str:
+        audio_config = speechsdk.audio.AudioConfig(filename=audio)
+        speech_recognizer = speechsdk.SpeechRecognizer(speech_config=self.speech_config, audio_config=audio_config)
+        return self._result_text(speech_recognizer.recognize_once())
 
+    def _result_text(self, result) -> str:
+        if result.reason == speechsdk.ResultReason.RecognizedSpeech:
+            return result.text
+        if result.reason == speechsdk.ResultReason.Canceled:
+            print("Recognition Canceled: {}".format(result.cancellation_details.reason))
+        return ""
 
-        audio_config = speechsdk.AudioConfig(filename=temp_file)
-        speech_recognizer = speechsdk.SpeechRecognizer(speech_config=self.speech_config, audio_config=audio_config)
+    def create_stream(self, on_segment=None):
+        return AzureStream(self.speech_config, self.stream_format, on_segment)
+
+
+class AzureStream:
+    """
+    Continuous recognition over one PushAudioInputStream.
+
+    The recognizer is created once per source and kept running; feed() only writes
+    PCM frames. Interim (recognizing) and final (recognized) results arrive on SDK
+    threads and are folded into the phrase text that feed() returns, so partials
+    reach the transcript without per-utterance setup. The final result of the last
+    utterance arrives after the audio ends, so at the end of a phrase finalize()
+    flushes the stream and waits for it before reset() moves the phrase start.
+    """
+
+    TICKS_PER_SECOND = 10_000_000  # result offsets are in 100ns ticks
+
+    def __init__(self, speech_config, stream_format, on_segment=None):
+        self.speech_config = speech_config
+        self.stream_format = stream_format
+        self.on_segment = on_segment
+        self.push_stream = None
+        self.recognizer = None
+        self._lock = threading.Lock()
+        self._recognized = threading.Condition(self._lock)  # notified when an utterance is closed
+        self._flushed = False    # finalize() already wrote the flush silence
+        self._written_samples = 0
+        self._phrase_start = 0   # stream offset (ticks) where the current phrase begins
+        self._final_text = ""    # recognized utterances of the current phrase
+        self._interim_text = ""  # latest hypothesis of the utterance in progress
+
+    def _start(self):
+        self.push_stream = speechsdk.audio.PushAudioInputStream(stream_format=self.stream_format)
+        audio_config = speechsdk.audio.AudioConfig(stream=self.push_stream)
+        self.recognizer = speechsdk.SpeechRecognizer(speech_config=self.speech_config, audio_config=audio_config)
+        self.recognizer.recognizing.connect(self._on_recognizing)
+        self.recognizer.recognized.connect(self._on_recognized)
+        self.recognizer.canceled.connect(self._on_canceled)
+        self.recognizer.start_continuous_recognition_async()
+
+    def feed(self, audio: np.ndarray) -> str:
+        """Write new 16kHz float32 samples and return the phrase text recognized so far."""
+        if self.recognizer is None:
+            self._start()
+        samples = np.asarray(audio).reshape(-1)
+        self.push_stream.write(_to_pcm16(samples))
+        with self._lock:
+            self._written_samples += len(samples)
+            self._flushed = False
+            return self._text()
+
+    def finalize(self, timeout: float = FINALIZE_TIMEOUT) -> str:
+        """Close the current utterance and return the phrase text including its final result.
+
+        Waits up to timeout seconds for the recognized event; on timeout the latest
+        interim hypothesis stands in for it.
+        """
+        if self.recognizer is None:
+            with self._lock:
+                return self._text()
+        self._flush()
+        with self._recognized:
+            self._recognized.wait_for(lambda: not self._interim_text, timeout)
+            return self._text()
+
+    def reset(self):
+        """Start a new phrase; results for audio written before this point are ignored."""
+        if self.recognizer is not None and not self._flushed:
+            self._flush()
+        with self._lock:
+            self._phrase_start = self._written_samples * self.TICKS_PER_SECOND // SAMPLE_RATE
+            self._final_text = ""
+            self._interim_text = ""
+            self._flushed = False
+
+    def _flush(self):
+        # the VAD gate drops pauses from the stream, so write one to make Azure close
+        # the current utterance instead of continuing it into the next phrase
+        silence = np.zeros(int(FLUSH_SILENCE_SECONDS * SAMPLE_RATE), dtype=np.float32)
+        self.push_stream.write(_to_pcm16(silence))
+        with self._lock:
+            self._written_samples += len(silence)
+            self._flushed = True
+
+    def close(self):
+        if self.recognizer is not None:
+            self.push_stream.close()
+            self.recognizer.stop_continuous_recognition_async()
+            self.recognizer = None
+
+    def _text(self):
+        return " ".join(t for t in (self._final_text, self._interim_text) if t)
+
+    def _on_recognizing(self, evt):
+        with self._lock:
+            if evt.result.offset < self._phrase_start:
+                return
+            self._interim_text = evt.result.text
+
+    def _on_recognized(self, evt):
+        with self._recognized:
+            if evt.result.offset < self._phrase_start:
+                return
+            self._interim_text = ""
+            self._recognized.notify_all()
+            if evt.result.reason != speechsdk.ResultReason.RecognizedSpeech:
+                return
+            self._final_text = " ".join(t for t in (self._final_text, evt.result.text) if t)
+            text = self._final_text
+        if self.on_segment:
+            self.on_segment(text)
+
+    def _on_canceled(self, evt):
+        print("Recognition Canceled: {}".format(evt.cancellation_details.reason))
+        if evt.cancellation_details.reason == speechsdk.CancellationReason.Error:
+            print("Error Info: {}".format(evt.cancellation_details.error_details))
+
+
+def _to_pcm16(audio: np.ndarray) -> bytes:
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
 
-        return speech_recognizer.recognize_once()
-    
-    
 
 if __name__ == "__main__":
     service = VoiceRecognition()
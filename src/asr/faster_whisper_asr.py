@@ -1,13 +1,15 @@
 import numpy as np
-from faster_whisper import WhisperModel
+import ctranslate2
+from faster_whisper import WhisperModel, BatchedInferencePipeline
+from faster_whisper.audio import decode_audio
 from .asr_interface import ASRInterface
 from .asr_with_vad import VoiceRecognitionVAD
 
 
 class VoiceRecognition(ASRInterface):
 
-    BEAM_SEARCH = True
     SAMPLE_RATE = 16000  # Sample rate for input stream
+    CHUNK_SECONDS = 30  # Whisper's input window; longer clips are transcribed on their own
 
     def __init__(
         self,
@@ -15,11 +17,43 @@ class VoiceRecognition(ASRInterface):
         download_root: str = None,
         language: str = "en",
         device: str = "auto",
+        compute_type: str = "auto",
+        cpu_threads: int = 0,
+        beam_size: int = 5,
+        batched: bool = False,
+        batch_size: int = 8,
     ) -> None:
+        """
+        Args:
+            device: "cpu", "cuda" or "auto" (cuda when CTranslate2 sees a GPU).
+            compute_type: CTranslate2 compute type; "auto" picks int8 on CPU-only
+                hosts and float16 on GPU.
+            cpu_threads: CTranslate2 intra-op threads, 0 keeps its default.
+            beam_size: 1 for greedy decoding, >1 for beam search.
+            batched: decode through BatchedInferencePipeline, so several segments
+                (or the 30s windows of a long clip) share one forward pass.
+            batch_size: max windows per batched forward pass.
+        """
         self.MODEL_PATH = model_path
-        self.LANG = language
+        self.LANG = None if language == "auto" else language
 
-        self.model = WhisperModel(model_path, download_root=download_root, device=device, compute_type="float32")
+        if device == "auto":
+            device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+        if compute_type == "auto":
+            compute_type = "int8" if device == "cpu" else "float16"
+        self.device = device
+        self.compute_type = compute_type
+        self.beam_size = max(1, int(beam_size))
+        self.batch_size = max(1, int(batch_size))
+
+        self.model = WhisperModel(
+            model_path,
+            download_root=download_root,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+        )
+        self.pipeline = BatchedInferencePipeline(model=self.model) if batched else None
         self.asr_with_vad = None
 
     def transcribe_with_local_vad(self) -> str:
@@ -27,18 +61,71 @@ class VoiceRecognition(ASRInterface):
             self.asr_with_vad = VoiceRecognitionVAD(self.transcribe_np)
         return self.asr_with_vad.start_listening()
 
-    def transcribe_np(self, audio: np.ndarray) -> str:
+    def transcribe_wav(self, audio) -> str:
+        return self.transcribe_np(decode_audio(audio, sampling_rate=self.SAMPLE_RATE))
 
-        segments, info = self.model.transcribe(
-            audio,
-            beam_size=5 if self.BEAM_SEARCH else 1,
-            language=self.LANG,
-            condition_on_previous_text=False,
-        )
+    def transcribe_np(self, audio: np.ndarray) -> str:
+        audio = np.asarray(audio, dtype=np.float32)
+        if self.pipeline is not None:
+            # clips longer than one window are split on speech by the pipeline's VAD
+            segments, info = self.pipeline.transcribe(
+                audio,
+                batch_size=self.batch_size,
+                beam_size=self.beam_size,
+                language=self.LANG,
+                without_timestamps=True,
+                vad_filter=len(audio) > self.CHUNK_SECONDS * self.SAMPLE_RATE,
+            )
+        else:
+            segments, info = self.model.transcribe(
+                audio,
+                beam_size=self.beam_size,
+                language=self.LANG,
+                condition_on_previous_text=False,
+                without_timestamps=True,
+            )
 
         text = [segment.text for segment in segments]
 
         if not text:
             return ""
         else:
-            return "".join(text)
+            return "".join(text).strip()
+
+    def transcribe_batch(self, audios: list) -> list:
+        """
+        Transcribe several float32 16kHz clips, returning texts in input order.
+
+        In batched mode the clips are laid end to end and passed as clip_timestamps,
+        so each one becomes a batch item of a single pipeline call.
+        """
+        audios = [np.asarray(audio, dtype=np.float32) for audio in audios]
+        max_samples = self.CHUNK_SECONDS * self.SAMPLE_RATE
+        short = [i for i, audio in enumerate(audios) if 0 < len(audio) <= max_samples]
+        if self.pipeline is None or len(short) < 2:
+            return [self.transcribe_np(audio) for audio in audios]
+
+        clips, offset = [], 0
+        for i in short:
+            clips.append({"start": offset, "end": offset + len(audios[i])})
+            offset += len(audios[i])
+        segments, info = self.pipeline.transcribe(
+            np.concatenate([audios[i] for i in short]),
+            batch_size=self.batch_size,
+            beam_size=self.beam_size,
+            language=self.LANG,
+            without_timestamps=True,
+            vad_filter=False,
+            clip_timestamps=clips,
+        )
+
+        texts = [""] * len(audios)
+        starts = np.array([clip["start"] for clip in clips]) / self.SAMPLE_RATE
+        for segment in segments:
+            # segment times are absolute in the concatenated audio; map back to its clip
+            item = short[max(0, int(np.searchsorted(starts, segment.start + 1e-3, side="right")) - 1)]
+            texts[item] += segment.text
+        for i, audio in enumerate(audios):
+            if i not in short and len(audio):
+                texts[i] = self.transcribe_np(audio)
+        return [text.strip() for text in texts]
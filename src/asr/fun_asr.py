@@ -2,8 +2,8 @@ import numpy as np
 from funasr import AutoModel
 from .asr_interface import ASRInterface
 from .asr_with_vad import VoiceRecognitionVAD
+from .text_utils import strip_sensevoice_tags
 
-import re
 import soundfile as sf
 import io
 import torch
@@ -62,42 +62,30 @@ class VoiceRecognition(ASRInterface):
             language=self.language,
         )
         
-        full_text = res[0]["text"]
+        return strip_sensevoice_tags(res[0]["text"])
 
-        # SenseVoiceSmall may spits out some tags
-        # like this: '<|zh|><|NEUTRAL|><|Speech|><|woitn|>欢迎大家来体验达摩院推出的语音识别模型'
-        # we should remove those tags from the result
+    def transcribe_np(self, audio: np.ndarray) -> str:
+        return self.transcribe_batch([audio])[0]
 
-        # remove tags
-        full_text = re.sub(r'<\|.*?\|>', '', full_text)
-        # the tags can also look like '< | en | > < | EMO _ UNKNOWN | > < | S pe ech | > < | wo itn | > ', so...
-        full_text = re.sub(r'< \|.*?\| >', '', full_text)
-        
-        return full_text.strip()
+    def transcribe_batch(self, audios: list) -> list:
+        """
+        Transcribe several float32 16kHz clips with a single generate() call.
+
+        Mic and speaker segments that are pending at the same time share one
+        forward pass; results are returned in the same order as the inputs.
+        """
+        # torch.from_numpy shares memory with the array instead of copying it
+        audio_tensors = [torch.from_numpy(np.ascontiguousarray(audio, dtype=np.float32)) for audio in audios]
 
-    def transcribe_np(self, audio: np.ndarray) -> str:
-        
-        audio_tensor = torch.tensor(audio, dtype=torch.float32)
-        
         res = self.model.generate(
-            input=audio_tensor,
+            input=audio_tensors,
+            batch_size=len(audio_tensors),
             batch_size_s=300,
             use_itn=self.use_itn,
             language=self.language,
         )
-        
-        full_text = res[0]["text"]
 
-        # SenseVoiceSmall may spits out some tags
-        # like this: '<|zh|><|NEUTRAL|><|Speech|><|woitn|>欢迎大家来体验达摩院推出的语音识别模型'
-        # we should remove those tags from the result
-
-        # remove tags
-        full_text = re.sub(r'<\|.*?\|>', '', full_text)
-        # the tags can also look like '< | en | > < | EMO _ UNKNOWN | > < | S pe ech | > < | wo itn | > ', so...
-        full_text = re.sub(r'< \|.*?\| >', '', full_text)
-        
-        return full_text.strip()
+        return [strip_sensevoice_tags(item["text"]) for item in res]
 
     def _numpy_to_wav_in_memory(self, numpy_array: np.ndarray, sample_rate):
 
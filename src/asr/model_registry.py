@@ -0,0 +1,161 @@
+import json
+import threading
+from collections import OrderedDict
+from .asr_factory import ASRFactory
+
+
+DEFAULT_MAX_RESIDENT = 2
+
+
+class ModelHandle:
+    """
+    A reference to a shared ASR model.
+
+    Attribute access is forwarded to the underlying model; method calls are
+    serialized with the model's lock so a handle can be used from any thread.
+    Call release() (or use the handle as a context manager) when done.
+    """
+
+    def __init__(self, registry, entry):
+        self._registry = registry
+        self._entry = entry
+        self._released = False
+
+    @property
+    def key(self):
+        return self._entry.key
+
+    @property
+    def model(self):
+        return self._entry.model
+
+    def __getattr__(self, name):
+        attr = getattr(self._entry.model, name)
+        if not callable(attr):
+            return attr
+        lock = self._entry.lock
+
+        def locked_call(*args, **kwargs):
+            with lock:
+                return attr(*args, **kwargs)
+        return locked_call
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._registry._release(self._entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class _Entry:
+    def __init__(self, key):
+        self.key = key
+        self.model = None
+        self.refcount = 0
+        self.lock = threading.RLock()
+        self.load_lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of loaded ASR models.
+
+    Models are keyed by backend name, config and replica index, loaded lazily
+    on first acquire and shared by every caller asking for the same key. Models
+    that are no longer referenced stay resident so switching back is free.
+    max_resident counts backends (name + config), not replicas: all replicas
+    of a backend are loaded and unloaded together, so a pool of N workers
+    takes one slot. Once more than max_resident backends are loaded, the
+    least recently used unreferenced ones are unloaded.
+    """
+
+    def __init__(self, max_resident: int = DEFAULT_MAX_RESIDENT):
+        self.max_resident = max(1, int(max_resident))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"loads": 0, "hits": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(system_name: str, config: dict, replica: int = 0):
+        return system_name, json.dumps(config or {}, sort_keys=True, default=str), replica
+
+    def acquire(self, system_name: str, config: dict = None, replica: int = 0) -> ModelHandle:
+        """
+        Return a handle to the model for (system_name, config, replica), loading it if needed.
+
+        Different replicas of the same backend are separate instances, so callers
+        that want parallel inference ask for distinct replica indices.
+        """
+        key = self.make_key(system_name, config, replica)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(key)
+            entry.refcount += 1
+            self._entries.move_to_end(key)
+
+        # load outside the registry lock so other backends can load in parallel
+        with entry.load_lock:
+            if entry.model is None:
+                try:
+                    entry.model = ASRFactory.get_asr_system(system_name, **(config or {}))
+                except Exception:
+                    self._release(entry)
+                    raise
+                with self._lock:
+                    self._stats["loads"] += 1
+            else:
+                with self._lock:
+                    self._stats["hits"] += 1
+
+        self._evict()
+        return ModelHandle(self, entry)
+
+    def _release(self, entry):
+        with self._lock:
+            entry.refcount = max(0, entry.refcount - 1)
+        self._evict()
+
+    def _evict(self):
+        """Unload the least recently used unreferenced backends beyond max_resident."""
+        evicted = []
+        with self._lock:
+            # entries whose load failed hold no model; drop them once unreferenced
+            for entry in [e for e in self._entries.values() if e.model is None and not e.refcount]:
+                del self._entries[entry.key]
+            # loaded entries grouped by backend, least recently used backend first
+            backends = OrderedDict()
+            for entry in self._entries.values():
+                if entry.model is not None:
+                    backends[entry.key[:2]] = backends.pop(entry.key[:2], []) + [entry]
+            excess = len(backends) - self.max_resident
+            for entries in backends.values():
+                if excess <= 0:
+                    break
+                if any(entry.refcount for entry in entries):
+                    continue
+                for entry in entries:
+                    del self._entries[entry.key]
+                    evicted.append(entry)
+                excess -= 1
+            self._stats["evictions"] += len(evicted)
+        for entry in evicted:
+            with entry.lock:
+                entry.model = None
+            print(f"[INFO] Unloaded ASR model {entry.key[0]} (replica {entry.key[2]})")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["resident"] = sum(1 for e in self._entries.values() if e.model is not None)
+            stats["backends"] = len({e.key[:2] for e in self._entries.values() if e.model is not None})
+            stats["referenced"] = sum(1 for e in self._entries.values() if e.refcount)
+        return stats
+
+
+registry = ModelRegistry()
@@ -28,8 +28,9 @@ class VoiceRecognition(ASRInterface):
         return self.asr_with_vad.start_listening()
     
     def transcribe_np(self, audio: np.ndarray) -> str:
-        segments = self.model.transcribe(audio)
-        full_text = ""
-        for segment in segments:
-            full_text += segment
-        return full_text
+        result = self.model.transcribe(audio.astype(np.float32, copy=False))
+        return result["text"].strip()
+
+    def transcribe_wav(self, audio) -> str:
+        result = self.model.transcribe(audio)
+        return result["text"].strip()
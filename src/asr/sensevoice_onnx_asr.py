@@ -0,0 +1,148 @@
+import os
+import numpy as np
+import onnxruntime as ort
+import kaldi_native_fbank as knf
+import sentencepiece as spm
+import soundfile as sf
+from .asr_interface import ASRInterface
+from .asr_with_vad import VoiceRecognitionVAD
+from .text_utils import strip_sensevoice_tags
+from ..config import PathConfig
+
+# query token ids expected by the exported SenseVoiceSmall graph
+LANGUAGE_IDS = {"auto": 0, "zh": 3, "en": 4, "yue": 7, "ja": 11, "ko": 12, "nospeech": 13}
+TEXTNORM_IDS = {"withitn": 14, "woitn": 15}
+
+LFR_M = 7
+LFR_N = 6
+BLANK_ID = 0
+
+
+class VoiceRecognition(ASRInterface):
+    """
+    SenseVoiceSmall exported to ONNX (optionally INT8-quantized), run with onnxruntime.
+
+    model_dir is the directory produced by FunASR's export (or ModelScope's
+    iic/SenseVoiceSmall-onnx) and must contain model.onnx and/or model_quant.onnx,
+    am.mvn and the sentencepiece model. Relative paths are resolved against the
+    project root. No PyTorch is needed.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        quantize: bool = True,
+        language: str = "auto",
+        use_itn: bool = False,
+        intra_op_threads: int = 4,
+        inter_op_threads: int = 1,
+        bpe_model: str = "chn_jpn_yue_eng_ko_spectok.bpe.model",
+        sample_rate: int = 16000,
+    ) -> None:
+        if not os.path.isabs(model_dir):
+            model_dir = os.path.join(PathConfig.get_project_root(), model_dir)
+        model_file = os.path.join(model_dir, "model_quant.onnx" if quantize else "model.onnx")
+        if not os.path.exists(model_file):
+            raise FileNotFoundError(f"SenseVoice ONNX model not found: {model_file}")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_file, sess_options=options, providers=["CPUExecutionProvider"])
+        self.output_names = [output.name for output in self.session.get_outputs()]
+
+        self.tokenizer = spm.SentencePieceProcessor()
+        self.tokenizer.load(os.path.join(model_dir, bpe_model))
+        self.neg_mean, self.inv_stddev = self._load_cmvn(os.path.join(model_dir, "am.mvn"))
+
+        if language not in LANGUAGE_IDS:
+            raise ValueError(f"Unsupported SenseVoice language: {language}")
+        self.language = language
+        self.use_itn = use_itn
+        self.sample_rate = sample_rate
+
+        self.asr_with_vad = None
+
+    def transcribe_with_local_vad(self) -> str:
+        if self.asr_with_vad is None:
+            self.asr_with_vad = VoiceRecognitionVAD(self.transcribe_np)
+        return self.asr_with_vad.start_listening()
+
+    def transcribe_wav(self, audio) -> str:
+        samples, sample_rate = sf.read(audio, dtype="float32", always_2d=True)
+        if sample_rate != self.sample_rate:
+            raise ValueError(f"Expected {self.sample_rate}Hz audio, got {sample_rate}Hz")
+        return self.transcribe_np(samples.mean(axis=1))
+
+    def transcribe_np(self, audio: np.ndarray) -> str:
+        return self.transcribe_batch([audio])[0]
+
+    def transcribe_batch(self, audios: list) -> list:
+        """Transcribe several float32 16kHz clips in one session run, in input order."""
+        features = [self._features(audio) for audio in audios]
+        lengths = np.array([len(feature) for feature in features], dtype=np.int32)
+        speech = np.zeros((len(features), max(lengths.max(), 1), features[0].shape[1]), dtype=np.float32)
+        for i, feature in enumerate(features):
+            speech[i, :len(feature)] = feature
+
+        batch = len(features)
+        logits, logits_lengths = self.session.run(self.output_names[:2], {
+            "speech": speech,
+            "speech_lengths": lengths,
+            "language": np.full(batch, LANGUAGE_IDS[self.language], dtype=np.int32),
+            "textnorm": np.full(batch, TEXTNORM_IDS["withitn" if self.use_itn else "woitn"], dtype=np.int32),
+        })
+        return [self._decode(logits[i, :logits_lengths[i]]) for i in range(batch)]
+
+    def _features(self, audio: np.ndarray) -> np.ndarray:
+        """Kaldi fbank -> low frame rate stacking -> CMVN, as in FunASR's WavFrontend."""
+        opts = knf.FbankOptions()
+        opts.frame_opts.samp_freq = self.sample_rate
+        opts.frame_opts.dither = 0
+        opts.frame_opts.window_type = "hamming"
+        opts.frame_opts.frame_shift_ms = 10
+        opts.frame_opts.frame_length_ms = 25
+        opts.frame_opts.snip_edges = True
+        opts.mel_opts.num_bins = 80
+        opts.energy_floor = 0
+        fbank = knf.OnlineFbank(opts)
+        # the frontend was trained on int16-scaled samples
+        fbank.accept_waveform(self.sample_rate, (np.asarray(audio, dtype=np.float32) * 32768).tolist())
+        fbank.input_finished()
+        if fbank.num_frames_ready == 0:
+            return np.zeros((0, 80 * LFR_M), dtype=np.float32)
+        frames = np.stack([fbank.get_frame(i) for i in range(fbank.num_frames_ready)]).astype(np.float32)
+
+        # stack LFR_M frames every LFR_N frames, padding with the first/last frame
+        left = (LFR_M - 1) // 2
+        count = int(np.ceil(len(frames) / LFR_N))
+        right = max(0, (count - 1) * LFR_N + LFR_M - left - len(frames))
+        padded = np.concatenate([np.repeat(frames[:1], left, axis=0), frames,
+                                 np.repeat(frames[-1:], right, axis=0)])
+        index = np.arange(count)[:, None] * LFR_N + np.arange(LFR_M)[None, :]
+        stacked = padded[index].reshape(count, -1)
+
+        return (stacked + self.neg_mean) * self.inv_stddev
+
+    def _decode(self, logits: np.ndarray) -> str:
+        """CTC greedy decoding: collapse repeats, drop blanks, detokenize, strip tags."""
+        ids = logits.argmax(axis=-1)
+        if len(ids):
+            ids = ids[np.insert(ids[1:] != ids[:-1], 0, True)]
+        tokens = [int(i) for i in ids if i != BLANK_ID]
+        return strip_sensevoice_tags(self.tokenizer.decode(tokens))
+
+    @staticmethod
+    def _load_cmvn(path):
+        """Read the <AddShift>/<Rescale> vectors from a Kaldi nnet am.mvn file."""
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        vectors = {}
+        for i, line in enumerate(lines):
+            parts = line.split()
+            if parts and parts[0] in ("<AddShift>", "<Rescale>"):
+                values = lines[i + 1].split()
+                vectors[parts[0]] = np.array(values[3:-1], dtype=np.float32)
+        return vectors["<AddShift>"], vectors["<Rescale>"]
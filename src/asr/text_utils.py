@@ -0,0 +1,15 @@
+import re
+
+
+def strip_sensevoice_tags(text: str) -> str:
+    """Remove the language/emotion/event/itn tags SenseVoice prepends to its output."""
+    # SenseVoiceSmall may spits out some tags
+    # like this: '<|zh|><|NEUTRAL|><|Speech|><|woitn|>欢迎大家来体验达摩院推出的语音识别模型'
+    # we should remove those tags from the result
+
+    # remove tags
+    text = re.sub(r'<\|.*?\|>', '', text)
+    # the tags can also look like '< | en | > < | EMO _ UNKNOWN | > < | S pe ech | > < | wo itn | > ', so...
+    text = re.sub(r'< \|.*?\| >', '', text)
+
+    return text.strip()
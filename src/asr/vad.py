@@ -5,51 +5,96 @@
 # 
 #
 
+import threading
 import numpy as np
 import onnxruntime as ort
 
 SAMPLE_RATE = 16000
+# Silero v4 accepts 512/1024/1536-sample windows at 16kHz; the largest one covers three
+# base windows per session run. v5 only accepts 512 samples plus 64 samples of context.
+V4_WINDOW = 1536
+V5_WINDOW = 512
+V5_CONTEXT = 64
 
 
 class VAD:
-    _initial_h = np.zeros((2, 1, 64)).astype("float32")
-    _initial_c = np.zeros((2, 1, 64)).astype("float32")
+    """
+    Silero VAD (v4 h/c or v5 state layout, detected from the graph inputs).
 
-    def __init__(self, model_path, window_size_samples: int = int(SAMPLE_RATE / 10)):
-        self.ort_sess = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
-        self.window_size_samples = window_size_samples
+    The ONNX session is created once per model file and shared by every VAD
+    instance (one per audio source); only the recurrent state is per instance.
+    The session runs single-threaded with full graph optimization, since one
+    window is far too small to benefit from intra-op parallelism.
+    """
+
+    _sessions = {}
+    _sessions_lock = threading.Lock()
+
+    def __init__(self, model_path, window_size_samples: int = None):
+        self.ort_sess, self.version = self._get_session(str(model_path))
+        preferred = V5_WINDOW if self.version == 5 else V4_WINDOW
+        if self.version == 5 and window_size_samples not in (None, V5_WINDOW):
+            # v5 has no other window size at 16kHz
+            window_size_samples = V5_WINDOW
+        self.window_size_samples = window_size_samples or preferred
         self.sr = SAMPLE_RATE
-        self._h = self._initial_h
-        self._c = self._initial_c
+        self._sr = np.array(self.sr, dtype="int64")
+        self.reset()
+
+    @classmethod
+    def _get_session(cls, model_path):
+        with cls._sessions_lock:
+            if model_path not in cls._sessions:
+                options = ort.SessionOptions()
+                options.intra_op_num_threads = 1
+                options.inter_op_num_threads = 1
+                options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+                options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+                version = 5 if "state" in [i.name for i in session.get_inputs()] else 4
+                cls._sessions[model_path] = (session, version)
+            return cls._sessions[model_path]
 
     def reset(self):
-        self._h = self._initial_h
-        self._c = self._initial_c
+        if self.version == 5:
+            self._state = np.zeros((2, 1, 128), dtype=np.float32)
+            self._context = np.zeros((1, V5_CONTEXT), dtype=np.float32)
+        else:
+            self._h = np.zeros((2, 1, 64), dtype=np.float32)
+            self._c = np.zeros((2, 1, 64), dtype=np.float32)
+        self._remainder = np.zeros(0, dtype=np.float32)
 
     def process_chunk(self, chunk: np.ndarray) -> np.ndarray:
-        ort_inputs = {
-            "input": np.expand_dims(chunk, 0),
-            "h": self._h,
-            "c": self._c,
-            "sr": np.array(self.sr, dtype="int64"),
-        }
-        out, self._h, self._c = self.ort_sess.run(None, ort_inputs)
+        """Run one window (v5: exactly 512 samples) and return its speech probability."""
+        chunk = np.asarray(chunk, dtype=np.float32).reshape(1, -1)
+        if self.version == 5:
+            x = np.concatenate((self._context, chunk), axis=1)
+            out, self._state = self.ort_sess.run(None, {"input": x, "state": self._state, "sr": self._sr})
+            self._context = x[:, -V5_CONTEXT:]
+        else:
+            out, self._h, self._c = self.ort_sess.run(None, {"input": chunk, "h": self._h, "c": self._c, "sr": self._sr})
         return np.squeeze(out)
 
+    def process_windows(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Return the speech probability of every complete window in audio.
+
+        Samples that don't fill a window are kept and prepended to the next call,
+        so callers can pass chunks of any length without losing audio.
+        """
+        audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        if len(self._remainder):
+            audio = np.concatenate((self._remainder, audio))
+        windows = len(audio) // self.window_size_samples
+        probabilities = np.empty(windows, dtype=np.float32)
+        for i in range(windows):
+            start = i * self.window_size_samples
+            probabilities[i] = self.process_chunk(audio[start:start + self.window_size_samples])
+        self._remainder = audio[windows * self.window_size_samples:].copy()
+        return probabilities
+
     def process_file(self, audio: np.ndarray):
         self.reset()
-        results = []
-        for i in range(0, len(audio), self.window_size_samples):
-            chunk = audio[i : i + self.window_size_samples]
-            if len(chunk) < self.window_size_samples:
-                break
-            ort_inputs = {
-                "input": np.expand_dims(chunk, 0),
-                "h": self._h,
-                "c": self._c,
-                "sr": np.array(self.sr, dtype="int64"),
-            }
-            out, self._h, self._c = self.ort_sess.run(None, ort_inputs)
-            results.append(np.squeeze(out))
-        results = np.stack(results, axis=0)
-        return results
\ No newline at end of file
+        results = self.process_windows(audio)
+        self._remainder = np.zeros(0, dtype=np.float32)
+        return results
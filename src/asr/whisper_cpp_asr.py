@@ -1,23 +1,36 @@
 from pywhispercpp.model import Model
 
+import threading
 import numpy as np
 from .asr_interface import ASRInterface
 from .asr_with_vad import VoiceRecognitionVAD
 
 
+SAMPLE_RATE = 16000
+PROMPT_CHARS = 200  # committed text passed back as the prompt of the next window
+MAX_OVERLAP_WORDS = 8
 
 
 class VoiceRecognition(ASRInterface):
 
+    supports_streaming = True
+
     def __init__(
         self,
         model_name: str = "base",
         model_dir="asr/models",
         language: str = "en",
         print_realtime=False,
-        print_progress=False, **kwargs
+        print_progress=False,
+        stream_chunk: float = 1.0,
+        stream_overlap: float = 0.3,
+        **kwargs
     ) -> None:
-        
+        """
+        Args:
+            stream_chunk: seconds of new audio a stream collects before decoding it
+            stream_overlap: seconds of already decoded audio decoded again as context for the next chunk
+        """
         self.model = Model(
             model=model_name,
             models_dir=model_dir,
@@ -26,17 +39,102 @@ class VoiceRecognition(ASRInterface):
             print_progress=print_progress,
             **kwargs
         )
+        self.stream_chunk = stream_chunk
+        self.stream_overlap = stream_overlap
+        # one whisper context, shared by every stream of this model
+        self._lock = threading.Lock()
         self.asr_with_vad = None
-        
+
     def transcribe_with_local_vad(self) -> str:
         if self.asr_with_vad is None:
             self.asr_with_vad = VoiceRecognitionVAD(self.transcribe_np)
         return self.asr_with_vad.start_listening()
 
+    def transcribe_wav(self, audio) -> str:
+        with self._lock:
+            segments = self.model.transcribe(audio)
+        return "".join(segment.text for segment in segments).strip()
+
     def transcribe_np(self, audio: np.ndarray) -> str:
-        segments = self.model.transcribe(audio, new_segment_callback=print)
-        full_text = ""
-        for segment in segments:
-            full_text += segment.text
-        return full_text
+        return "".join(segment.text for segment in self.decode(audio)).strip()
+
+    def decode(self, audio: np.ndarray, prompt: str = ""):
+        """Decode float32 16kHz audio and return whisper segments (t0/t1 in 10ms units).
+
+        No new_segment_callback is passed: pywhispercpp keeps it on the Model class,
+        so it would be shared by every replica and stream decoding concurrently.
+        """
+        with self._lock:
+            return self.model.transcribe(
+                np.ascontiguousarray(audio, dtype=np.float32),
+                initial_prompt=prompt,
+                no_context=True,
+            )
+
+    def create_stream(self, on_segment=None):
+        return WhisperCppStream(self, self.stream_chunk, self.stream_overlap, on_segment)
+
+
+class WhisperCppStream:
+    """
+    Incremental transcription on a loaded whisper.cpp model.
+
+    New samples are collected until there are chunk_seconds of them, then only
+    that chunk is decoded, preceded by overlap_seconds of the previous audio as
+    acoustic context; words the overlap decodes twice are dropped when the text
+    is merged. Each sample is decoded about once, so the cost of a session grows
+    linearly with its length. The session text tail is passed as the prompt of
+    the next chunk, so each stream keeps its own context even when mic and
+    speaker share one model. on_segment is called by the stream itself after
+    each decode that produced segments, with the session text.
+    """
+
+    def __init__(self, recognition, chunk_seconds, overlap_seconds, on_segment=None):
+        self.recognition = recognition
+        self.chunk_samples = int(chunk_seconds * SAMPLE_RATE)
+        self.overlap_samples = int(overlap_seconds * SAMPLE_RATE)
+        self.on_segment = on_segment
+        self.reset()
+
+    def reset(self):
+        self._context = np.zeros(0, dtype=np.float32)  # tail of the decoded audio
+        self._pending = np.zeros(0, dtype=np.float32)  # new audio not decoded yet
+        self._text = ""
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def feed(self, audio: np.ndarray) -> str:
+        """Append new samples, decode them once a chunk is collected and return the session text."""
+        self._pending = np.concatenate((self._pending, np.asarray(audio, dtype=np.float32).reshape(-1)))
+        if len(self._pending) >= self.chunk_samples:
+            self._decode_pending()
+        return self._text
+
+    def finalize(self) -> str:
+        """Decode whatever is still pending (end of phrase) and return the session text."""
+        if len(self._pending):
+            self._decode_pending()
+        return self._text
+
+    def _decode_pending(self):
+        window = np.concatenate((self._context, self._pending))
+        segments = self.recognition.decode(window, self._text[-PROMPT_CHARS:])
+        self._text = _merge(self._text, "".join(segment.text for segment in segments).strip())
+        if self.on_segment and segments:
+            self.on_segment(self._text)
+        self._context = window[max(0, len(window) - self.overlap_samples):] if self.overlap_samples else window[:0]
+        self._pending = window[:0]
+
 
+def _merge(head: str, tail: str) -> str:
+    """Join committed and new text, dropping words the overlap decoded twice."""
+    if not head or not tail:
+        return head or tail
+    head_words, tail_words = head.split(), tail.split()
+    for n in range(min(MAX_OVERLAP_WORDS, len(head_words), len(tail_words)), 0, -1):
+        if [w.lower().strip(".,!?") for w in head_words[-n:]] == [w.lower().strip(".,!?") for w in tail_words[:n]]:
+            tail_words = tail_words[n:]
+            break
+    return " ".join(head_words + tail_words)
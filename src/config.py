@@ -116,6 +116,9 @@ class SystemConfig:
     _instance = None
     _system_role = ""
     _record_only_mode = False  # Add new class variable for record-only mode
+    _speculative_mode = False        # Speaker的partial识别结果稳定后提前生成回复（需在设置中开启）
+    _speculative_delay = 0.8         # partial结果保持不变多久后开始推测生成（秒）
+    _speculative_match_ratio = 0.9   # 最终文本与推测文本的相似度不低于该值时采用推测结果
 
     @classmethod
     def get_system_role(cls):
@@ -137,11 +140,107 @@ class SystemConfig:
             value (bool): True to enable record-only mode, False to disable
         """
         cls._record_only_mode = bool(value)
+
+    @classmethod
+    def get_speculative_mode(cls):
+        return cls._speculative_mode
+
+    @classmethod
+    def set_speculative_mode(cls, value: bool):
+        cls._speculative_mode = bool(value)
+
+    @classmethod
+    def get_speculative_delay(cls):
+        return cls._speculative_delay
+
+    @classmethod
+    def set_speculative_delay(cls, seconds):
+        try:
+            seconds = float(seconds)
+            if seconds >= 0:
+                cls._speculative_delay = seconds
+                return True
+            return False
+        except ValueError:
+            return False
+
+    @classmethod
+    def get_speculative_match_ratio(cls):
+        return cls._speculative_match_ratio
         
 class AudioConfig:
     _instance = None
     _phrase_timeout = 5.2  # 默认值
     _buffer_chunks = 1     # 默认值
+    _streaming_mode = True  # 流式转写：只重新识别短语的尾部窗口
+    _stream_window = 8.0    # 流式转写尾部窗口的最大长度（秒）
+    _vad_gate = True        # 采集时用Silero VAD过滤非语音chunk
+    _endpoint_mode = "vad"  # 短语结束方式: vad（停顿检测，需要VAD门控）/ timeout（墙钟超时）
+    _audio_queue_size = 16  # 每个音频源队列最多积压的chunk数
+    _audio_queue_policy = "merge"  # 队列满时的处理方式: merge / drop_oldest / drop_newest
+
+    @classmethod
+    def get_vad_gate(cls):
+        return cls._vad_gate
+
+    @classmethod
+    def set_vad_gate(cls, value: bool):
+        cls._vad_gate = bool(value)
+
+    @classmethod
+    def get_endpoint_mode(cls):
+        """VAD门控关闭时只能使用墙钟超时"""
+        return cls._endpoint_mode if cls._vad_gate else "timeout"
+
+    @classmethod
+    def set_endpoint_mode(cls, mode):
+        if mode in ("vad", "timeout"):
+            cls._endpoint_mode = mode
+            return True
+        return False
+
+    @classmethod
+    def get_audio_queue_size(cls):
+        return cls._audio_queue_size
+
+    @classmethod
+    def get_audio_queue_policy(cls):
+        return cls._audio_queue_policy
+
+    @classmethod
+    def set_audio_queue_policy(cls, size, policy):
+        try:
+            size = int(size)
+            if size >= 2 and policy in ("merge", "drop_oldest", "drop_newest"):
+                cls._audio_queue_size = size
+                cls._audio_queue_policy = policy
+                return True
+            return False
+        except ValueError:
+            return False
+
+    @classmethod
+    def get_streaming_mode(cls):
+        return cls._streaming_mode
+
+    @classmethod
+    def set_streaming_mode(cls, value: bool):
+        cls._streaming_mode = bool(value)
+
+    @classmethod
+    def get_stream_window(cls):
+        return cls._stream_window
+
+    @classmethod
+    def set_stream_window(cls, value):
+        try:
+            value = float(value)
+            if 2 <= value <= 30:
+                cls._stream_window = value
+                return True
+            return False
+        except ValueError:
+            return False
 
     @classmethod
     def get_buffer_chunks(cls):
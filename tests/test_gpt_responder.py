@@ -0,0 +1,62 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from src.GPTResponder import GPTResponder
+from src.ResponseManager import ResponseManager, STATUS_COMPLETE, STATUS_SKIPPED
+
+
+class FakeStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            if self.closed:
+                return
+            self.read += 1
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=chunk))])
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def responder(monkeypatch):
+    monkeypatch.setattr(GPTResponder, "_initialize_openai", lambda self, *args: True)
+    return GPTResponder(ResponseManager())
+
+
+def answer(responder, chunks):
+    stream = FakeStream(chunks)
+    responder.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: stream)))
+    response_id = responder.response_manager.create_response(
+        question_time=datetime.datetime.now(), question_text="Can you tell me the price of the plan?")
+    responder._start_job(response_id, "Can you tell me the price of the plan?")
+    responder._job.thread.join(5)
+    return responder.response_manager.get_response(response_id), stream
+
+
+def test_none_after_long_preface_is_skipped(responder):
+    chunks = ["After reading the conversation carefully, ", "I think no reply is needed here: ",
+              "[No", "ne]", " The customer is", " still talking."]
+    response, stream = answer(responder, chunks)
+    assert response.status == STATUS_SKIPPED
+    assert stream.closed
+    assert stream.read == 4
+    stats = responder.get_generation_stats()
+    assert stats["skipped"] == 1
+    assert stats["skipped_tokens"] == 4
+
+
+def test_stream_closed_after_answer_brackets(responder):
+    chunks = ["Here is the response you could give to the customer: ", "[Hello", " there]", " Hope", " this helps."]
+    response, stream = answer(responder, chunks)
+    assert response.status == STATUS_COMPLETE
+    assert response.response_text == "Hello there"
+    assert stream.closed
+    assert stream.read == 3
+    assert responder.get_generation_stats()["completed"] == 1
@@ -0,0 +1,50 @@
+import pytest
+
+from src.ResponseParser import ResponseParser
+
+REPLIES = [
+    ("Here is the response you could give to the customer: [Hello there] hope this helps", "Hello there", False),
+    ("[Sure, I can help with that.]", "Sure, I can help with that.", False),
+    ("After reading the conversation, no reply is needed from you here: [None]", "None", True),
+    ("[none.]", "none.", True),
+    ("[]", "", True),
+    ("Hello there, no brackets in this reply at all", "Hello there, no brackets in this reply at all", False),
+]
+
+
+def parse(reply, chunk_size):
+    parser = ResponseParser()
+    streamed = "".join(parser.feed(reply[i:i + chunk_size]) for i in range(0, len(reply), chunk_size))
+    streamed += parser.finish()
+    return streamed, parser
+
+
+@pytest.mark.parametrize("reply, expected, is_none", REPLIES)
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 100])
+def test_output_does_not_depend_on_chunking(reply, expected, is_none, chunk_size):
+    streamed, parser = parse(reply, chunk_size)
+    assert streamed == expected
+    assert parser.text == expected
+    assert parser.is_none == is_none
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 100])
+def test_done_after_first_brackets(chunk_size):
+    reply = "Here is the response you could give to the customer: [Hello there] and [more]"
+    parser = ResponseParser()
+    for i in range(0, len(reply), chunk_size):
+        parser.feed(reply[i:i + chunk_size])
+        if parser.done:
+            break
+    assert parser.done
+    assert parser.text == "Hello there"
+
+
+def test_none_verdict_detected_before_finish_after_long_preface():
+    parser = ResponseParser()
+    for chunk in ["After reading the conversation carefully, ", "my conclusion is: [No", "ne]", " trailing"]:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    assert parser.is_none
+    assert parser.text == ""
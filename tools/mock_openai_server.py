@@ -0,0 +1,151 @@
+#tools/mock_openai_server.py
+"""
+本地模拟OpenAI API的HTTP服务器，用于在没有网络/API密钥时测试API转写和回复生成
+
+用法：
+    python tools/mock_openai_server.py --port 8765 --latency 0.3 --fail-rate 0.2 --token-delay 0.03
+然后在conf.yaml中设置 OpenAIWhisper.base_url / OpenAIChat.base_url: "http://127.0.0.1:8765/v1"，
+.env中的OPENAI_API_KEY可以是任意值。
+
+支持 POST /v1/audio/transcriptions、POST /v1/chat/completions（含stream=True的SSE流）
+和 GET /v1/models（连接保活请求）；GET /v1/stats 返回请求数和新建连接数，
+connections 不随请求增长说明连接被复用。
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 支持keep-alive，可以验证连接复用
+    latency = 0.0
+    fail_rate = 0.0
+    token_delay = 0.0
+    reply = "[This is a mock answer from the local server.]"
+    stats = {"requests": 0, "connections": 0, "failures": 0, "bytes": 0, "pings": 0, "cancelled_streams": 0}
+    stats_lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with self.stats_lock:
+            self.stats["connections"] += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.stats_lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += len(body)
+        time.sleep(self.latency)
+
+        if random.random() < self.fail_rate:
+            with self.stats_lock:
+                self.stats["failures"] += 1
+            self._send_json(500, {"error": {"message": "mock server error", "type": "server_error"}})
+            return
+
+        if self.path.rstrip("/").endswith("/audio/transcriptions"):
+            self._send_json(200, {"text": f"mock transcription of {len(body)} bytes"})
+        elif self.path.rstrip("/").endswith("/chat/completions"):
+            self._chat_completion(json.loads(body or b"{}"))
+        else:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}", "type": "invalid_request_error"}})
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            with self.stats_lock:
+                self._send_json(200, dict(self.stats))
+        elif self.path.rstrip("/").endswith("/models"):
+            with self.stats_lock:
+                self.stats["pings"] += 1
+            self._send_json(200, {"object": "list", "data": [
+                {"id": "gpt-4o-mini", "object": "model", "created": 0, "owned_by": "mock"},
+            ]})
+        else:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}", "type": "invalid_request_error"}})
+
+    def _chat_completion(self, request):
+        """回复固定文本；stream=True时按token_delay逐词发送SSE chunk"""
+        model = request.get("model", "gpt-4o-mini")
+        created = int(time.time())
+        if not request.get("stream"):
+            self._send_json(200, {
+                "id": "chatcmpl-mock", "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": self.reply}}],
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = self.reply.split(" ")
+        try:
+            for i, word in enumerate(words):
+                delta = {"content": word if i == 0 else " " + word}
+                if i == 0:
+                    delta["role"] = "assistant"
+                self._send_event({
+                    "id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+                })
+                time.sleep(self.token_delay)
+            self._send_event({
+                "id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            })
+            self._send_chunk(b"data: [DONE]\n\n")
+            self._send_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端取消了生成并关闭了流
+            with self.stats_lock:
+                self.stats["cancelled_streams"] += 1
+            self.close_connection = True
+
+    def _send_event(self, payload):
+        self._send_chunk(b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n")
+
+    def _send_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds added to every response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--token-delay", type=float, default=0.03, help="seconds between streamed chat tokens")
+    args = parser.parse_args()
+
+    MockOpenAIHandler.latency = args.latency
+    MockOpenAIHandler.fail_rate = args.fail_rate
+    MockOpenAIHandler.token_delay = args.token_delay
+    server = ThreadingHTTPServer((args.host, args.port), MockOpenAIHandler)
+    print(f"Mock OpenAI server on http://{args.host}:{args.port}/v1 (GET /v1/stats for counters)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()